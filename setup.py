@@ -11,13 +11,12 @@ yandex package for mobile energy consumption measurements
     maintainer_email='direvius@yandex-team.ru',
     url='https://github.com/yandex-load/volta',
     packages=find_packages(exclude=["tests", "tmp", "docs", "data"]),
-    python_requires='>=3',
+    python_requires='>=3.9',
     install_requires=[
         'tornado',
         'pandas>=0.23.0',
         'seaborn',
         'numpy>=1.11.0',
-        'scipy',
         'matplotlib',
         'requests',
         'pyserial',
@@ -39,6 +38,7 @@ yandex package for mobile energy consumption measurements
             'volta = volta.api.cli:main',
             'volta-http = volta.api.http:main',
             'volta-uploader = volta.core.postloader:main',
+            'volta-sync = volta.listeners.sync.offline:main',
             'volta-api = volta.api.manager:main'
         ],
     },
@@ -0,0 +1,62 @@
+""" TimeChopper throughput benchmark
+
+Feeds synthetic BoxBinaryReader output through TimeChopper and reports samples/s and peak RSS.
+Every sample rate is measured in a separate process, so peak RSS values don't affect each other.
+
+Usage, from repo root: python tests/chopper_benchmark.py --seconds 60 --rates 10000 100000 1000000
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+
+# runnable from repo root w/o installed volta, like tests run by pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fakes import SerialSource  # noqa: E402
+from volta.common.util import TimeChopper  # noqa: E402
+from volta.providers.boxes.box_binary import BoxBinaryReader  # noqa: E402
+
+
+def synthetic_chunks(sample_rate, seconds):
+    raw = np.random.randint(0, 1024, sample_rate * seconds, dtype='<u2').tobytes()
+    source = SerialSource(raw, sample_rate)
+    reader = BoxBinaryReader(source, sample_rate)
+    while source.tell() < len(raw):
+        # reader reuses its output buffer
+        yield reader._read_chunk().copy()
+
+
+def measure(args):
+    sample_rate, seconds, chop_ratio = args
+    chunks = list(synthetic_chunks(sample_rate, seconds))
+    samples = 0
+    start_time = time.time()
+    for chunk in TimeChopper(chunks, sample_rate, chop_ratio):
+        samples += len(chunk)
+    elapsed = time.time() - start_time
+    # ru_maxrss is in kilobytes on linux and in bytes on macos
+    return sample_rate, samples, samples / elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TimeChopper benchmark')
+    parser.add_argument('--seconds', type=int, default=60, help='seconds of data per sample rate')
+    parser.add_argument('--chop-ratio', type=float, default=1.0)
+    parser.add_argument('--rates', type=int, nargs='+', default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    print('{:>10} {:>12} {:>14} {:>12}'.format('rate', 'samples', 'samples/s', 'peak rss'))
+    for rate in args.rates:
+        with ctx.Pool(1) as pool:
+            rate, samples, throughput, rss = pool.apply(measure, ((rate, args.seconds, args.chop_ratio),))
+        print('{:>10} {:>12} {:>14.0f} {:>12}'.format(rate, samples, throughput, rss))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+""" Config, data session and core fakes shared by tests and benchmarks
+"""
+import io
+
+import pkg_resources
+import yaml
+
+from volta.common.runtime import ThreadRuntime
+from volta.common.util import CommandPool
+
+SCHEMA = yaml.safe_load(pkg_resources.resource_string('volta.core', 'config/schema.yaml'))
+
+
+class SerialSource(io.BytesIO):
+    """ In-memory serial device w/o backlog: a read gets at most `read_latency` seconds of samples
+
+    Reads from memory are much faster than the box sends data, so reader would adapt its read size
+    to this throughput and read the whole stream in a few huge chunks
+    """
+
+    def __init__(self, data, sample_rate, read_latency=0.05):
+        super(SerialSource, self).__init__(data)
+        self.max_read = int(sample_rate * 2 * read_latency)
+
+    def readinto(self, target):
+        return super(SerialSource, self).readinto(memoryview(target)[:self.max_read])
+
+
+class Config(object):
+    """ Config sections w/ schema defaults, missing options w/o default raise KeyError like VoltaConfig does
+
+    Args:
+        sections: section options, e.g. Config(volta={'source': 'emulator'}, sync={'search_interval': 10})
+    """
+
+    def __init__(self, **sections):
+        self.sections = {
+            name: {key: value['default'] for key, value in section['schema'].items() if 'default' in value}
+            for name, section in SCHEMA.items()
+        }
+        for name, options in sections.items():
+            self.sections.setdefault(name, {}).update(options)
+
+    def get_option(self, section, option, default=None):
+        try:
+            return self.sections[section][option]
+        except KeyError:
+            if default is not None:
+                return default
+            raise
+
+
+class Manager(object):
+    """ Records subscription filters """
+
+    def __init__(self):
+        self.subscriptions = []
+
+    def subscribe(self, callback, filter_):
+        self.subscriptions.append(filter_)
+
+
+class Metric(object):
+    def put(self, df):
+        pass
+
+
+class DataSession(object):
+    """ Records meta of created metrics """
+
+    def __init__(self):
+        self.manager = Manager()
+        self.metrics = []
+        self.job_id = 'job'
+
+    def new_true_metric(self, name, **kw):
+        self.metrics.append(dict(kw, name=name))
+        return Metric()
+
+    new_event_metric = new_true_metric
+
+
+class Core(object):
+    def __init__(self, config=None, runtime=None):
+        self.config = config or Config()
+        self.data_session = DataSession()
+        self.currents_listeners = []
+        self.runtime = runtime or ThreadRuntime()
+        self.adb_pool = CommandPool(
+            self.config.get_option('phone', 'adb_workers'), self.config.get_option('phone', 'adb_timeout')
+        )
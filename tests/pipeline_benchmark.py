@@ -0,0 +1,258 @@
+""" Pipeline stages throughput benchmark
+
+Measures throughput, per-chunk latency and peak traced memory of the hot pipeline stages
+on synthetic in-memory data:
+
+    reader      BoxBinaryReader._read_chunk over raw uint16 samples, 50 ms of samples per read
+    chopper     TimeChopper over reader output
+    logparser   LogParser over logcat lines w/ volta custom events
+    prefilter   LogParser w/ `[volta]` prefilter over the same lines, items are all lines read
+    sync        SyncFinder currents collection and sync search over square wave currents and sync events
+    postloader  local_storage data file read, the way volta.core.postloader reads it
+
+Each stage runs in a separate process, so stages don't affect each other's memory.
+Results can be saved as a baseline and later compared with it, a stage is a regression
+if its throughput drops below baseline by more than tolerance.
+
+Usage, from repo root:
+    python tests/pipeline_benchmark.py
+    python tests/pipeline_benchmark.py --save tests/benchmark_baseline.json
+    python tests/pipeline_benchmark.py --compare tests/benchmark_baseline.json --tolerance 0.3
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+# runnable from repo root w/o installed volta, like tests run by pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fakes import Config, Core, SerialSource  # noqa: E402
+from volta.common.util import TimeChopper, LogParser, CurrentsChunk, sample_timestamps  # noqa: E402
+from volta.listeners.sync.sync import SyncFinder  # noqa: E402
+from volta.providers.boxes.box_binary import BoxBinaryReader  # noqa: E402
+from volta.providers.phones.android import event_regexp  # noqa: E402
+
+SAMPLE_RATE = 10000
+READ_LATENCY = 0.05
+
+
+def raw_samples(seconds):
+    return np.random.RandomState(0).randint(0, 1024, SAMPLE_RATE * seconds, dtype='<u2').tobytes()
+
+
+def bench_reader(seconds):
+    raw = raw_samples(seconds)
+    source = SerialSource(raw, SAMPLE_RATE, READ_LATENCY)
+    reader = BoxBinaryReader(source, SAMPLE_RATE, read_latency=READ_LATENCY)
+    samples, latencies = 0, []
+    while source.tell() < len(raw):
+        start_time = time.perf_counter()
+        chunk = reader._read_chunk()
+        latencies.append(time.perf_counter() - start_time)
+        samples += len(chunk)
+    return samples, latencies
+
+
+def bench_chopper(seconds):
+    raw = raw_samples(seconds)
+    source = SerialSource(raw, SAMPLE_RATE, READ_LATENCY)
+    reader = BoxBinaryReader(source, SAMPLE_RATE, read_latency=READ_LATENCY)
+    chunks = []
+    while source.tell() < len(raw):
+        # reader reuses its output buffer
+        chunks.append(reader._read_chunk().copy())
+    samples, latencies = 0, []
+    chopper = iter(TimeChopper(chunks, SAMPLE_RATE, 0.1))
+    while True:
+        start_time = time.perf_counter()
+        try:
+            chunk = next(chopper)
+        except StopIteration:
+            break
+        latencies.append(time.perf_counter() - start_time)
+        samples += len(chunk)
+    return samples, latencies
+
+
+def logcat_lines(count):
+    """ logcat lines, every 10th line is volta custom event """
+    lines = []
+    for i in range(count):
+        ts = '10-18 12:{:02d}:{:02d}.{:03d}'.format(i // 60000 % 60, i // 1000 % 60, i % 1000)
+        if i % 10:
+            message = 'ActivityManager: some phone log message number {}'.format(i)
+        else:
+            message = 'volta: [volta] {} sync fragment {}'.format(i * 10 ** 6, 'rise' if i % 20 else 'fall')
+        lines.append('{} 1234 1234 I {}\n'.format(ts, message).encode('utf-8'))
+    return lines
+
+
+def bench_logparser(seconds, prefilter=None):
+    lines_per_second = 200
+    lines = logcat_lines(seconds * lines_per_second)
+    source = queue.Queue()
+    parser = LogParser(
+        source, re.compile(event_regexp, re.VERBOSE | re.IGNORECASE), 'android', batch_interval=0,
+        prefilter=prefilter
+    )
+    entries = iter(parser)
+    rows, latencies, pending = 0, [], -1  # parser holds back the last entry of a chunk
+    for first in range(0, len(lines), lines_per_second):
+        chunk = lines[first:first + lines_per_second]
+        for line in chunk:
+            source.put(line)
+        pending += len([line for line in chunk if not prefilter or b'[volta]' in line])
+        start_time = time.perf_counter()
+        while pending > 0:
+            df = next(entries)
+            rows += len(df)
+            pending -= len(df)
+        latencies.append(time.perf_counter() - start_time)
+    parser.closed = True
+    return rows if not prefilter else len(lines), latencies
+
+
+def bench_prefilter(seconds):
+    return bench_logparser(seconds, prefilter=['[volta]'])
+
+
+def bench_sync(seconds):
+    search_interval = min(seconds, 30)
+    rnd = np.random.RandomState(0)
+    start_uts, lag = 1500000000 * 10 ** 6, 12345
+    # flashlight blinks w/ random periods from 100 to 500 ms
+    events_ts = np.cumsum(rnd.randint(100, 500, search_interval) * 1000) + 10 ** 6
+    events = pd.DataFrame({
+        'sys_uts': start_uts + events_ts,
+        'log_uts': events_ts,
+        'message': ['rise' if i % 2 == 0 else 'fall' for i in range(len(events_ts))],
+        'custom_metric_type': 'sync',
+    })
+    levels = np.zeros(SAMPLE_RATE * search_interval + lag, dtype=np.float32)
+    for rise, fall in zip(events_ts[::2], events_ts[1::2]):
+        levels[lag + rise * SAMPLE_RATE // 10 ** 6:lag + fall * SAMPLE_RATE // 10 ** 6] = 500
+    levels += rnd.normal(100, 20, len(levels)).astype(np.float32)
+
+    finder = SyncFinder(Config(sync={'search_interval': search_interval}), Core())
+    finder.sample_rate = SAMPLE_RATE
+    finder.put_syncs(events)
+    step = SAMPLE_RATE // 10
+    start_time = time.perf_counter()
+    for first in range(0, len(levels), step):
+        value = levels[first:first + step]
+        finder.put_current(CurrentsChunk(sample_timestamps(first, len(value), SAMPLE_RATE) + start_uts, value))
+    offsets = finder.find_sync_points()
+    latency = time.perf_counter() - start_time
+    if abs(offsets.get('sys_uts_offset', 0) - lag * 10 ** 6 // SAMPLE_RATE) >= 10 ** 6 // SAMPLE_RATE:
+        raise RuntimeError('Sync found wrong offset: {}'.format(offsets))
+    return search_interval * SAMPLE_RATE, [latency]
+
+
+def bench_postloader(seconds):
+    rows = seconds * SAMPLE_RATE
+    meta = {
+        'type': 'metrics',
+        'names': ['ts', 'value'],
+        'dtypes': {'ts': 'int64', 'value': 'float32'},
+    }
+    data = pd.DataFrame({
+        'ts': sample_timestamps(0, rows, SAMPLE_RATE),
+        'value': np.random.RandomState(0).normal(100, 20, rows).astype(np.float32),
+    })
+    fd, path = tempfile.mkstemp(suffix='.data')
+    try:
+        with os.fdopen(fd, 'w') as data_file:
+            data_file.write(json.dumps(meta) + '\n')
+            data.to_csv(data_file, sep='\t', header=False, index=False)
+        start_time = time.perf_counter()
+        with open(path, 'r') as data_file:
+            meta = json.loads(data_file.readline())
+        df = pd.read_csv(path, sep='\t', skiprows=1, names=meta['names'], dtype=meta['dtypes'])
+        latency = time.perf_counter() - start_time
+    finally:
+        os.remove(path)
+    return len(df), [latency]
+
+
+STAGES = {
+    'reader': bench_reader,
+    'chopper': bench_chopper,
+    'logparser': bench_logparser,
+    'prefilter': bench_prefilter,
+    'sync': bench_sync,
+    'postloader': bench_postloader,
+}
+
+
+def measure(args):
+    stage, seconds = args
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    items, latencies = STAGES[stage](seconds)
+    elapsed = sum(latencies) or time.perf_counter() - start_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'items': items,
+        'items_per_second': items / elapsed,
+        'chunks': len(latencies),
+        'latency_p50_ms': float(np.percentile(latencies, 50)) * 1000,
+        'latency_p99_ms': float(np.percentile(latencies, 99)) * 1000,
+        'peak_memory_mb': peak / 2. ** 20,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """ Stages w/ throughput below baseline by more than tolerance """
+    regressions = []
+    for stage, result in results.items():
+        if stage not in baseline:
+            continue
+        threshold = baseline[stage]['items_per_second'] * (1 - tolerance)
+        if result['items_per_second'] < threshold:
+            regressions.append(stage)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Volta pipeline benchmark')
+    parser.add_argument('--seconds', type=int, default=60, help='seconds of data per stage')
+    parser.add_argument('--stages', nargs='+', default=sorted(STAGES), choices=sorted(STAGES))
+    parser.add_argument('--save', help='save results as baseline to this file')
+    parser.add_argument('--compare', help='compare results w/ baseline from this file')
+    parser.add_argument('--tolerance', type=float, default=0.3, help='allowed throughput drop, fraction')
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    results = {}
+    print('{:>12} {:>10} {:>14} {:>8} {:>10} {:>10} {:>10}'.format(
+        'stage', 'items', 'items/s', 'chunks', 'p50 ms', 'p99 ms', 'peak mb'))
+    for stage in args.stages:
+        with ctx.Pool(1) as pool:
+            result = results[stage] = pool.apply(measure, ((stage, args.seconds),))
+        print('{:>12} {items:>10} {items_per_second:>14.0f} {chunks:>8} {latency_p50_ms:>10.3f} '
+              '{latency_p99_ms:>10.3f} {peak_memory_mb:>10.1f}'.format(stage, **result))
+
+    if args.save:
+        with open(args.save, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        if regressions:
+            print('Throughput regressions: {}'.format(', '.join(regressions)))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
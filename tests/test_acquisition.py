@@ -0,0 +1,65 @@
+import io
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from volta.providers.boxes.acquisition import SharedRing
+from volta.providers.boxes.box_binary import SharedRingReader
+
+
+@pytest.fixture
+def ring():
+    ring = SharedRing(11)
+    yield ring
+    if ring.counters is not None:
+        ring.close()
+
+
+def test_capacity_is_rounded_up_to_even(ring):
+    assert ring.capacity == 12
+
+
+def test_write_peek_consume_across_wrap_point(ring):
+    source = io.BytesIO(bytes(range(30)))
+    assert ring.write_from(source, 8) == 8
+    assert bytes(ring.peek(100)) == bytes(range(8))
+    ring.consume(6)
+
+    # only 4 bytes fit before the end of the ring, the rest is written on the next call from the start
+    assert ring.write_from(source, 10) == 4
+    assert ring.write_from(source, 10) == 6
+    assert len(ring) == 12
+    assert ring.write_from(source, 10) is None
+    assert ring.stalls == 1
+
+    assert bytes(ring.peek(100)) == bytes(range(6, 12))
+    ring.consume(6)
+    assert bytes(ring.peek(100)) == bytes(range(12, 18))
+    ring.consume(6)
+    assert len(ring) == 0
+    assert bytes(ring.peek(100)) == b''
+
+
+def test_close_unlinks_drained_ring(ring):
+    name = ring.shm.name
+    ring.write_from(io.BytesIO(b'\x00' * 4), 4)
+    ring.consume(4)
+    ring.close()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_shared_ring_reader(ring):
+    samples = np.arange(9, dtype='<u2')
+    source = io.BytesIO(samples.tobytes())
+    reader = SharedRingReader(ring, 1000, precision=12, power_voltage=4096, read_latency=0)
+    values = []
+    while len(values) < len(samples):
+        ring.write_from(source, 7)
+        chunk = reader._read_chunk()
+        if chunk is not None:
+            values.extend(chunk.tolist())
+    assert values == samples.tolist()
+    assert reader.counters.samples == len(samples)
+    assert reader._read_chunk() is None
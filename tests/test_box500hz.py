@@ -0,0 +1,52 @@
+import numpy as np
+
+from volta.providers.boxes.box500hz import BoxPlainTextReader
+
+
+class ChunkedSource(object):
+    """ Returns prepared chunks on read, empty bytes when exhausted """
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def read(self, size):
+        return self.chunks.pop(0) if self.chunks else b''
+
+
+def read_all(chunks):
+    reader = BoxPlainTextReader(ChunkedSource(chunks), 500, read_latency=0)
+    result = [reader._read_chunk() for _ in chunks]
+    return np.concatenate(result), reader
+
+
+def test_partial_line_is_carried_over():
+    values, reader = read_all([b'10\n2', b'0\n30', b'\n40\n5'])
+    assert values.tolist() == [10., 20., 30., 40.]
+    assert reader.buffer == b'5'
+    assert reader.counters.bad_lines == 0
+
+
+def test_crlf_line_endings():
+    values, reader = read_all([b'10\r\n20\r', b'\n30\r\n'])
+    assert values.tolist() == [10., 20., 30.]
+    assert reader.counters.bad_lines == 0
+
+
+def test_garbage_line_is_dropped_and_counted():
+    values, reader = read_all([b'10\n20\n3x0\n40\n50\n60\n7'])
+    assert values.tolist() == [10., 20., 40., 50., 60.]
+    assert reader.buffer == b'7'
+    assert reader.counters.bad_lines == 1
+    assert reader.counters.get_info()['bad_lines'] == 1
+
+
+def test_line_w_several_tokens_is_dropped():
+    values, reader = read_all([b'10\n12 34\n40\n'])
+    assert values.tolist() == [10., 40.]
+    assert reader.counters.bad_lines == 1
+
+
+def test_empty_lines_are_skipped():
+    values, reader = read_all([b'10\n\n\r\n40\n', b'no newline yet'])
+    assert values.tolist() == [10., 40.]
+    assert reader.counters.bad_lines == 0
@@ -0,0 +1,138 @@
+import numpy as np
+import pytest
+
+from volta.providers.boxes.box_binary import swap_samples, BoxBinaryReader
+from volta.providers.boxes.replay import BoxReplayReader
+
+
+def reference_swap(data, swap):
+    """ Byte by byte sample swap, as it was done before vectorization """
+    lst = bytearray(data)
+    for i in range(len(lst) // 2):
+        word = (lst[i * 2 + 1] << 8) + lst[i * 2]
+        if word > 0x0FFF or (swap and (word & 0x00F0) == 0):
+            swap = True
+            lst[i * 2], lst[i * 2 + 1] = lst[i * 2 + 1], lst[i * 2]
+        else:
+            swap = False
+    return bytes(lst), swap
+
+
+def random_stream(rnd, size):
+    """ 12 bit samples w/ empty second nibbles and swapped samples mixed in """
+    samples = rnd.randint(0, 0x1000, size).astype('<u2')
+    samples[rnd.rand(size) < 0.3] &= 0xFF0F
+    swapped = rnd.rand(size) < 0.2
+    samples[swapped] = samples[swapped].byteswap()
+    return samples.tobytes()
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_swap_samples_matches_reference(seed):
+    rnd = np.random.RandomState(seed)
+    data = random_stream(rnd, rnd.randint(1, 2000))
+    initial = bool(rnd.randint(2))
+    expected, expected_swap = reference_swap(data, initial)
+
+    samples = np.frombuffer(bytearray(data), dtype='<u2')
+    swap = swap_samples(samples, initial)
+    assert samples.tobytes() == expected
+    assert swap == expected_swap
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_swap_samples_carries_state_between_chunks(seed):
+    rnd = np.random.RandomState(seed)
+    data = random_stream(rnd, 5000)
+    expected, expected_swap = reference_swap(data, False)
+
+    samples = np.frombuffer(bytearray(data), dtype='<u2')
+    bounds = np.sort(rnd.randint(0, len(samples), 20))
+    swap = False
+    for chunk in np.split(samples, bounds):
+        swap = swap_samples(chunk, swap)
+    assert samples.tobytes() == expected
+    assert swap == expected_swap
+
+
+def test_swap_samples_empty_chunk_keeps_state():
+    assert swap_samples(np.array([], dtype='<u2'), True) is True
+
+
+class ReadOnlySource(object):
+    """ source w/o readinto """
+    def __init__(self, data):
+        self.data = data
+
+    def read(self, size):
+        chunk, self.data = self.data[:size], self.data[size:]
+        return chunk
+
+
+
+class BackloggedSource(ReadOnlySource):
+    """ source w/ serial device buffer backlog """
+    def __init__(self, data, in_waiting):
+        super(BackloggedSource, self).__init__(data)
+        self.in_waiting = in_waiting
+
+class BrokenSource(ReadOnlySource):
+    def readinto(self, target):
+        raise AttributeError('serial internals')
+
+
+def test_reader_reads_sources_wo_readinto():
+    source = ReadOnlySource(np.arange(10, dtype='<u2').tobytes())
+    reader = BoxBinaryReader(source, 1000, precision=12, power_voltage=4096)
+    assert reader._read_chunk().tolist() == list(range(10))
+
+
+def test_reader_doesnt_swallow_readinto_errors():
+    reader = BoxBinaryReader(BrokenSource(b'\x00' * 10), 1000)
+    with pytest.raises(AttributeError):
+        reader._read_chunk()
+
+
+def test_replay_reader_stops_at_end_of_file(caplog):
+    source = ReadOnlySource(np.arange(10, dtype='<u2').tobytes())
+    reader = BoxReplayReader(source, 1000, precision=12, power_voltage=4096, read_latency=0)
+    with caplog.at_level('INFO', logger='volta.providers.boxes.replay'):
+        chunks = [chunk if chunk is None else chunk.copy() for chunk in reader]
+    assert np.concatenate(chunks[:-1]).tolist() == list(range(10))
+    assert chunks[-1] is None
+    assert [r.message for r in caplog.records].count('Replay finished, 10 samples read') == 1
+
+
+def test_read_size_at_nominal_rate():
+    reader = BoxBinaryReader(BackloggedSource(b'', 0), 10000, read_latency=0.05)
+    # 2 bytes per sample, 50 ms of samples
+    assert reader._next_read_size() == 1000
+
+
+def test_read_size_follows_measured_throughput():
+    reader = BoxBinaryReader(BackloggedSource(b'', 0), 10000, read_latency=0.05)
+    reader.throughput = reader.nominal_throughput * 3
+    assert reader._next_read_size() == 3000
+    # throughput below nominal doesn't shrink reads
+    reader.throughput = reader.nominal_throughput / 2
+    assert reader._next_read_size() == 1000
+
+
+def test_read_size_drains_backlog():
+    reader = BoxBinaryReader(BackloggedSource(b'', 7000), 10000, read_latency=0.05)
+    assert reader._next_read_size() == 7000
+    assert reader.in_waiting == 7000
+
+
+def test_read_size_is_capped_by_buffer():
+    reader = BoxBinaryReader(BackloggedSource(b'', 10 ** 9), 10000, read_latency=0.05)
+    # 10 seconds of samples
+    assert reader._next_read_size() == reader.read_size == 200000
+    reader.source.in_waiting = 0
+    reader.throughput = 10 ** 9
+    assert reader._next_read_size() == 200000
+
+
+def test_read_size_is_at_least_one_sample():
+    reader = BoxBinaryReader(BackloggedSource(b'', 0), 10, read_latency=0.001)
+    assert reader._next_read_size() == 2
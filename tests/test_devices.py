@@ -0,0 +1,130 @@
+import threading
+import time
+
+import pytest
+
+import fakes
+from volta.core.devices import DeviceConfig, make_devices, for_each_device
+
+
+class Box(object):
+    sample_rate = 1000
+
+    def __init__(self, config, core):
+        self.source = config.get_option('volta', 'source')
+        core.data_session.new_true_metric('current', source='voltabox')
+        self.started = None
+
+    def start_test(self, results):
+        time.sleep(0.2)
+        self.started = threading.current_thread().name
+
+    def end_test(self):
+        pass
+
+    def is_finished(self):
+        return True
+
+
+class Factory(object):
+    def detect_volta(self, config, core):
+        return Box(config, core)
+
+
+class Core(fakes.Core):
+    def __init__(self, config):
+        super(Core, self).__init__(config)
+        self.config_enabled = ['volta', 'console', 'devices']
+        self.factory = Factory()
+
+
+def make_core():
+    config = fakes.Config(
+        volta={'type': 'binary', 'source': '/dev/null', 'chop_ratio': 1},
+        devices={'list': [{'name': 'left', 'volta': {'source': '/dev/left'}}, {'volta': {'chop_ratio': 2}}]},
+    )
+    return Core(config)
+
+
+def test_device_config_overrides_common_sections():
+    config = DeviceConfig(make_core().config, {'volta': {'source': '/dev/left'}, 'devices': {'list': []}})
+    assert config.get_option('volta', 'source') == '/dev/left'
+    assert config.get_option('volta', 'chop_ratio') == 1
+    assert len(config.get_option('devices', 'list')) == 2
+    with pytest.raises(KeyError):
+        config.get_option('volta', 'missing')
+
+
+def test_device_metrics_and_subscriptions_are_tagged():
+    core = make_core()
+    left, right = make_devices(core.config, core)
+    assert (left.name, right.name) == ('left', '1')
+    assert (left.volta.source, right.volta.source) == ('/dev/left', '/dev/null')
+    assert (left.config.get_option('volta', 'chop_ratio'), right.config.get_option('volta', 'chop_ratio')) == (1, 2)
+    assert [metric['device'] for metric in core.data_session.metrics] == ['left', '1']
+    core.data_session.manager.subscribe(None, {'type': 'events', 'source': 'phone'})
+    left.data_session.manager.subscribe(None, {'type': 'events', 'source': 'phone'})
+    assert core.data_session.manager.subscriptions == [
+        {'type': 'events', 'source': 'phone'},
+        {'type': 'events', 'source': 'phone', 'device': 'left'},
+    ]
+
+
+def test_console_is_run_per_device():
+    core = make_core()
+    left, right = make_devices(core.config, core)
+    for_each_device([left, right], 'configure')
+    assert left.enabled_modules == [left.console]
+    assert left.currents_listeners == [left.console.put]
+    assert right.currents_listeners == [right.console.put]
+    assert left.console.prefix == '\ndevice: left'
+    assert not core.currents_listeners
+
+
+@pytest.mark.parametrize('overrides', [
+    {'volta': {'chop_ratio': 'one'}},
+    {'volta': {'no_such_option': 1}},
+    {'phone': {'test_apps': 'com.app'}},
+])
+def test_invalid_device_overrides(overrides):
+    core = make_core()
+    core.config.sections['devices']['list'] = [dict(overrides, name='bad')]
+    with pytest.raises(RuntimeError, match='bad'):
+        make_devices(core.config, core)
+
+
+def test_devices_start_concurrently():
+    core = make_core()
+    devices = make_devices(core.config, core)
+    start_time = time.time()
+    for_each_device(devices, 'start_test', None, None)
+    assert time.time() - start_time < 0.35
+    assert devices[0].volta.started != devices[1].volta.started
+
+
+def test_device_errors_are_raised_after_all_devices():
+    core = make_core()
+    devices = make_devices(core.config, core)
+    devices[0].end_test = lambda: 1 / 0
+    ended = []
+    devices[1].end_test = lambda: ended.append(True)
+    with pytest.raises(ZeroDivisionError):
+        for_each_device(devices, 'end_test')
+    assert ended == [True]
+
+
+def test_duplicate_device_names():
+    core = make_core()
+    core.config.sections['devices']['list'] = [{'name': 'a'}, {'name': 'a'}]
+    with pytest.raises(RuntimeError):
+        make_devices(core.config, core)
+
+
+def test_devices_share_core_adb_pool():
+    core = make_core()
+    left, right = make_devices(core.config, core)
+    assert left.adb_pool is right.adb_pool is core.adb_pool
+    results = [left.adb_pool.submit('true').result(), right.adb_pool.submit('true').result()]
+    assert [result['retcode'] for result in results] == [0, 0]
+    core.adb_pool.close()
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith('volta-commands')]
@@ -0,0 +1,90 @@
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+pytest.importorskip('serial')
+
+from fakes import Config, Core  # noqa: E402
+from volta.common.runtime import AsyncRuntime  # noqa: E402
+from volta.providers.boxes.emulator import VoltaBoxEmulated  # noqa: E402
+
+
+def volta_config(**options):
+    return Config(volta=dict({'source': 'emulator', 'chop_ratio': 0.1}, **options))
+
+
+def grab(seconds, runtime=None, **options):
+    core = Core(runtime=runtime)
+    chunks = []
+    core.currents_listeners.append(lambda chunk: chunks.append(chunk.value.copy()))
+    box = VoltaBoxEmulated(volta_config(**options), core)
+    box.start_test(None)
+    time.sleep(seconds)
+    info = box.get_info()
+    box.end_test()
+    return np.concatenate(chunks), info
+
+
+@pytest.mark.parametrize('sample_rate', [10000, 100000])
+def test_emulated_stream_is_continuous(sample_rate):
+    values, info = grab(2, sample_rate=sample_rate, power_voltage=4096, precision=12)
+    assert info['emulator']['overrun_bytes'] == 0
+    assert len(values) > sample_rate
+    assert np.array_equal(values, np.arange(len(values)) % 4096)
+
+
+def test_emulated_stream_in_async_runtime():
+    runtime = AsyncRuntime()
+    try:
+        values, info = grab(2, runtime=runtime, sample_rate=10000, power_voltage=4096, precision=12)
+    finally:
+        runtime.close()
+    assert len(values) > 10000
+    assert np.array_equal(values, np.arange(len(values)) % 4096)
+    assert runtime.loop.is_closed()
+
+
+def test_emulated_swapped_samples_are_fixed():
+    values, info = grab(
+        1, sample_rate=10000, power_voltage=4096, precision=12, sample_swap=True,
+        emulator={'swap_rate': 0.01, 'seed': 0}
+    )
+    expected = np.arange(len(values)) % 4096
+    # samples w/ empty second nibble are valid either way, so swap heuristic can't tell
+    undetectable = (expected & 0x00F0) == 0
+    assert len(values) > 5000
+    assert np.array_equal(values[~undetectable], expected[~undetectable])
+
+
+def test_emulated_byte_drops_are_noticed():
+    values, info = grab(1, sample_rate=10000, emulator={'drop_rate': 0.001, 'seed': 0})
+    assert info['emulator']['dropped_bytes'] > 0
+    assert info['grabber_counters']['samples'] < info['emulator']['sent_samples']
+
+
+def test_acquisition_process_releases_shared_memory():
+    box = VoltaBoxEmulated(volta_config(sample_rate=10000, acquisition='process'), Core())
+    box.start_test(None)
+    time.sleep(1)
+    name = box.acquisition_ring.shm.name
+    box.end_test()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+class BrokenDataSession(object):
+    def new_true_metric(self, name, **kw):
+        raise RuntimeError('data session is not ready')
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason='open fds are listed in procfs')
+def test_pty_is_closed_if_box_init_fails():
+    core = Core()
+    core.data_session = BrokenDataSession()
+    fds = set(os.listdir('/proc/self/fd'))
+    with pytest.raises(RuntimeError):
+        VoltaBoxEmulated(volta_config(), core)
+    assert set(os.listdir('/proc/self/fd')) == fds
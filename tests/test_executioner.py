@@ -0,0 +1,64 @@
+import sys
+import time
+
+from volta.common.util import Executioner, CommandPool
+
+SCRIPT = "import sys; sys.stdout.write('first\\nsecond\\n' * 1000 + 'last'); sys.stderr.write('oops\\n')"
+
+
+def run(**kwargs):
+    worker = Executioner('{} -c "{}"'.format(sys.executable, SCRIPT), **kwargs)
+    out_q, err_q = worker.execute()
+    worker.process.wait()
+    worker.process_reader.join(10)
+    assert not worker.process_reader.is_alive()
+    return [out_q.get_nowait() for _ in range(out_q.qsize())], [err_q.get_nowait() for _ in range(err_q.qsize())]
+
+
+def test_lines_are_split():
+    outs, errs = run()
+    assert outs == [b'first\n', b'second\n'] * 1000 + [b'last']
+    assert errs == [b'oops\n']
+
+
+def test_lines_are_batched():
+    outs, errs = run(batch=True, read_size=100)
+    assert all(isinstance(batch, list) for batch in outs)
+    assert len(outs) < 2001
+    assert [line for batch in outs for line in batch] == [b'first\n', b'second\n'] * 1000 + [b'last']
+    assert errs == [[b'oops\n']]
+
+
+def test_close_stops_reader():
+    worker = Executioner('{} -c "import time; time.sleep(30)"'.format(sys.executable))
+    worker.execute()
+    start_time = time.time()
+    worker.close()
+    assert time.time() - start_time < 5
+    assert not worker.process_reader.is_alive()
+
+
+def test_command_pool_runs_commands_concurrently():
+    pool = CommandPool(workers=3)
+    start_time = time.time()
+    futures = [pool.submit('{} -c "import time; time.sleep(0.5)"'.format(sys.executable)) for _ in range(3)]
+    failed = pool.submit('{} -c "import sys; sys.exit(3)"'.format(sys.executable))
+    results = [future.result() for future in futures]
+    assert time.time() - start_time < 1.4
+    assert all(result['retcode'] == 0 and result['elapsed'] >= 0.5 for result in results)
+    assert failed.result()['retcode'] == 3
+    assert pool.submit('no-such-command-volta').result()['retcode'] is None
+    assert len(pool.timings) == 5
+    pool.close()
+
+
+def test_command_pool_kills_timed_out_commands():
+    pool = CommandPool(workers=2, timeout=0.5)
+    start_time = time.time()
+    hung = pool.submit('{} -c "import time; time.sleep(30)"'.format(sys.executable))
+    output = pool.submit('{} -c "print(25)"'.format(sys.executable))
+    assert hung.result()['retcode'] is None
+    assert time.time() - start_time < 5
+    assert int(output.result()['stdout']) == 25
+    assert 'stdout' not in pool.timings[0]
+    pool.close()
@@ -0,0 +1,132 @@
+import datetime
+import queue
+import re
+
+import pytest
+
+from volta.common.util import LogParser, LogTimestampParser, format_ts_from_android, format_ts_from_iphone
+from volta.providers.phones.android import event_regexp, epoch_event_regexp
+
+LINES = [
+    '10-18 12:00:00.000 1234 1234 I ActivityManager: first\n',
+    '10-18 12:00:00.250 1234 1234 I volta: [volta] 5000000000 sync lightning rise\n',
+    '10-18 12:00:01.000 1234 1234 E AndroidRuntime: FATAL EXCEPTION\n',
+    '\tat com.example.Crash.run(Crash.java:42)\n',
+    '10-18 12:00:01.500 1234 1234 I volta: [volta] 6500000000 sync lightning fall\n',
+    '10-18 12:00:02.000 1234 1234 I ActivityManager: last\n',
+]
+
+
+def parse(lines, **kwargs):
+    source = queue.Queue()
+    for line in lines:
+        source.put(line.encode('utf-8'))
+    parser = LogParser(source, re.compile(event_regexp, re.VERBOSE | re.IGNORECASE), 'android', **kwargs)
+    frames, rows = [], 0
+    entries = iter(parser)
+    # the last entry is held by parser until the next one starts
+    while rows < len([line for line in lines if line[0].isdigit()]) - 1:
+        frames.append(next(entries))
+        rows += len(frames[-1])
+    parser.closed = True
+    return frames
+
+
+def test_log_entries_are_batched():
+    frames = parse(LINES, batch_interval=0)
+    assert len(frames) == 1
+    df = frames[0]
+    assert df.ts.tolist() == [0, 250000, 1000000, 1500000]
+    assert df.index.tolist() == df.ts.tolist()
+    assert df.sys_uts.tolist() == df.ts.tolist()
+
+
+def test_multiline_entries_are_concatenated():
+    df = parse(LINES, batch_interval=0)[0]
+    assert df.value.tolist()[2] == 'FATAL EXCEPTION__tab__at com.example.Crash.run(Crash.java:42)__nl__'
+
+
+def test_custom_events_columns():
+    df = parse(LINES, batch_interval=0)[0]
+    assert df.custom_metric_type.fillna('').tolist() == ['', 'sync', '', 'sync']
+    assert df.message.fillna('').tolist() == ['', 'rise', '', 'fall']
+    assert df.log_uts.fillna(-1).tolist() == [-1, 0, -1, 1500000]
+
+
+def test_prefilter_drops_irrelevant_lines():
+    source = queue.Queue()
+    for line in LINES:
+        source.put(line.encode('utf-8'))
+    parser = LogParser(
+        source, re.compile(event_regexp, re.VERBOSE | re.IGNORECASE), 'android',
+        batch_interval=0, prefilter=['[volta]', 'FATAL']
+    )
+    df = next(iter(parser))
+    parser.closed = True
+    assert df.value.tolist() == ['[volta] 5000000000 sync lightning rise', 'FATAL EXCEPTION']
+    assert parser.prefiltered == 3
+
+
+@pytest.mark.parametrize('batch_size', [1, 2, 3])
+def test_batch_size_bounds_frames(batch_size):
+    frames = parse(LINES, batch_size=batch_size, batch_interval=0)
+    assert all(len(df) <= batch_size for df in frames)
+    assert sum(len(df) for df in frames) == 4
+
+
+def uts(ts):
+    return int((ts - datetime.datetime(1970, 1, 1)).total_seconds() * 10 ** 6)
+
+
+@pytest.mark.parametrize('time_', ['12:00:00.000', '12:00:59.999', '12:01:00.5', '23:59:07.123456'])
+def test_android_timestamps_match_strptime(time_):
+    entry = {'date': '02-28', 'time': time_}
+    assert LogTimestampParser('android')(entry) == uts(format_ts_from_android(entry))
+
+
+def test_iphone_timestamps_match_strptime():
+    parser = LogTimestampParser('iphone')
+    for time_ in ['18:48:14', '18:48:59', '18:49:00']:
+        entry = {'month': 'Aug', 'date': '25', 'time': time_}
+        assert parser(entry) == uts(format_ts_from_iphone(entry))
+
+
+def test_timestamp_prefix_is_memoized():
+    parser = LogTimestampParser('android')
+    first = parser({'date': '10-18', 'time': '12:00:00.000'})
+    assert parser({'date': '10-18', 'time': '12:00:42.5'}) == first + 42500000
+    assert parser.prefix == ('10-18', '12:00')
+    assert parser({'date': '10-18', 'time': '12:01:00.000'}) == first + 60000000
+    assert parser.prefix == ('10-18', '12:01')
+
+
+@pytest.mark.parametrize('time_', ['12:00', '12-00-00.000', '12:00:0x.000', '12:00:00.abc', '12:00:61.000', '12:00:00'])
+def test_malformed_timestamps(time_):
+    with pytest.raises((ValueError, IndexError)):
+        LogTimestampParser('android')({'date': '10-18', 'time': time_})
+
+
+def test_epoch_format():
+    lines = [
+        '  1539864000.000  1234  1234 I ActivityManager: first\n',
+        '  1539864000.250  1234  1234 I volta: [volta] 5000000000 sync lightning rise\n',
+        '  1539864001.5  1234  1234 I ActivityManager: last\n',
+    ]
+    source = queue.Queue()
+    for line in lines:
+        source.put(line.encode('utf-8'))
+    parser = LogParser(source, re.compile(epoch_event_regexp, re.VERBOSE | re.IGNORECASE), 'android', batch_interval=0)
+    df = next(iter(parser))
+    parser.closed = True
+    assert df.ts.tolist() == [0, 250000]
+    assert LogTimestampParser('android')({'epoch': '1539864001.5'}) == 1539864001500000
+
+
+def test_lists_of_lines_are_read():
+    source = queue.Queue()
+    source.put([line.encode('utf-8') for line in LINES[:3]])
+    source.put([line.encode('utf-8') for line in LINES[3:]])
+    parser = LogParser(source, re.compile(event_regexp, re.VERBOSE | re.IGNORECASE), 'android', batch_interval=0)
+    df = next(iter(parser))
+    parser.closed = True
+    assert df.ts.tolist() == [0, 250000, 1000000, 1500000]
@@ -0,0 +1,94 @@
+import asyncio
+import sys
+import threading
+import time
+
+import pytest
+
+from volta.common.runtime import AsyncRuntime, ThreadRuntime, make_runtime
+
+SCRIPT = "import sys; sys.stdout.write('first\\nsecond\\n' * 1000 + 'last'); sys.stderr.write('oops\\n')"
+
+
+class Destination(object):
+    def __init__(self):
+        self.items = []
+
+    def put(self, item):
+        self.items.append(item)
+
+
+@pytest.fixture(params=['thread', 'asyncio'])
+def runtime(request):
+    runtime = AsyncRuntime(workers=4) if request.param == 'asyncio' else ThreadRuntime()
+    yield runtime
+    runtime.close()
+
+
+def test_drain(runtime):
+    destination = Destination()
+    drain = runtime.drain(iter(range(100)), destination)
+    drain.start()
+    drain.join(5)
+    assert not drain.is_alive()
+    assert destination.items == list(range(100))
+
+
+def test_periodic(runtime):
+    calls = []
+    task = runtime.periodic(lambda: calls.append(time.time()), 0.05)
+    time.sleep(0.5)
+    task.close()
+    assert 5 <= len(calls) <= 11
+
+
+def test_executioner(runtime):
+    worker = runtime.executioner('{} -c "{}"'.format(sys.executable, SCRIPT), batch=True)
+    out_q, err_q = worker.execute()
+    deadline = time.time() + 10
+    while worker.is_finished() is None and time.time() < deadline:
+        time.sleep(0.1)
+    worker.close()
+    assert worker.is_finished() == 0
+    lines = [line for _ in range(out_q.qsize()) for line in out_q.get_nowait()]
+    assert lines == [b'first\n', b'second\n'] * 1000 + [b'last']
+    assert err_q.get_nowait() == [b'oops\n']
+
+
+def test_async_executioner_close_kills_process():
+    runtime = AsyncRuntime()
+    worker = runtime.executioner('{} -c "import time; time.sleep(30)"'.format(sys.executable))
+    worker.execute()
+    worker.close()
+    assert worker.is_finished() is not None
+    runtime.close()
+
+
+def test_async_runtime_close_cancels_tasks():
+    runtime = AsyncRuntime()
+    cancelled = threading.Event()
+
+    async def forever():
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    future = runtime.submit(forever())
+    runtime.close()
+    assert cancelled.is_set()
+    assert future.cancelled()
+    assert runtime.loop.is_closed()
+    assert not runtime.thread.is_alive()
+
+
+def test_asyncio_runtime_is_sized_by_pipelines():
+    runtime = make_runtime('asyncio', pipelines=9)
+    try:
+        assert runtime.executor._max_workers == 9 + AsyncRuntime.spare_workers
+    finally:
+        runtime.close()
+    with pytest.raises(RuntimeError):
+        make_runtime('asyncio', workers=4, pipelines=9)
+    assert isinstance(make_runtime('thread', workers=1, pipelines=9), ThreadRuntime)
@@ -0,0 +1,323 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fakes import Config, Core
+from volta.common.util import CurrentsChunk, sample_timestamps
+from volta.listeners.sync.offline import scan_sync_windows, read_artifacts
+from volta.listeners.sync.sync import SyncFinder, prepare_sync_events, find_sync
+
+SAMPLE_RATE = 1000
+START_UTS = 1500000000 * 10 ** 6
+
+
+def make_finder(search_interval=10, min_confidence=0):
+    finder = SyncFinder(
+        Config(sync={'search_interval': search_interval, 'min_confidence': min_confidence}), Core()
+    )
+    finder.sample_rate = SAMPLE_RATE
+    return finder
+
+
+def blinks(seed, count):
+    """ sync events w/ random periods from 100 to 500 ms, starting at 1 second """
+    events_ts = np.cumsum(np.random.RandomState(seed).randint(100, 500, count) * 1000) + 10 ** 6
+    return pd.DataFrame({
+        'sys_uts': START_UTS + events_ts,
+        'log_uts': events_ts,
+        'message': ['rise' if i % 2 == 0 else 'fall' for i in range(count)],
+        'custom_metric_type': 'sync',
+    })
+
+
+def currents(events, lag, length):
+    """ square wave currents, lagging behind sync events by `lag` samples """
+    offsets = (events.sys_uts.values - START_UTS) * SAMPLE_RATE // 10 ** 6 + lag
+    levels = np.full(length, 100, dtype=np.float32)
+    for rise, fall in zip(offsets[::2], offsets[1::2]):
+        levels[rise:fall] = 500
+    return levels
+
+
+def put_currents(finder, levels, step=100, first_sample=0):
+    for first in range(0, len(levels), step):
+        value = levels[first:first + step]
+        ts = sample_timestamps(first_sample + first, len(value), SAMPLE_RATE) + START_UTS
+        finder.put_current(CurrentsChunk(ts, value))
+
+
+def test_sync_points_are_found_during_test():
+    finder = make_finder()
+    events = blinks(0, 10)
+    finder.put_syncs(events)
+    put_currents(finder, currents(events, 123, 15000))
+    finder.search.join()
+    assert abs(finder.sync_points['sys_uts_offset'] - 123 * 10 ** 6 // SAMPLE_RATE) < 10 ** 6 // SAMPLE_RATE / 2
+    assert finder.get_info()['currents_collected'] == 10 * SAMPLE_RATE
+    assert finder.find_sync_points() is finder.sync_points
+
+
+def test_sync_search_is_repeated_for_late_events():
+    finder = make_finder()
+    events = blinks(1, 12)
+    finder.put_syncs(events[:4])
+    put_currents(finder, currents(events, 77, 15000))
+    finder.put_syncs(events[4:])
+    assert abs(finder.find_sync_points()['sys_uts_offset'] - 77 * 10 ** 6 // SAMPLE_RATE) < 10 ** 6 // SAMPLE_RATE / 2
+    assert finder.sync_points_events == 12
+
+
+def test_sync_fails_wo_events():
+    finder = make_finder()
+    put_currents(finder, np.zeros(15000, dtype=np.float32))
+    assert finder.find_sync_points() == {}
+
+
+def test_sync_confidence():
+    events = blinks(2, 10)
+    levels = currents(events, 500, 15000)
+    finder = make_finder(min_confidence=5)
+    finder.put_syncs(events)
+    put_currents(finder, levels + np.random.RandomState(0).normal(0, 50, len(levels)).astype(np.float32))
+    assert finder.find_sync_points()['confidence'] > 5
+
+    finder = make_finder(min_confidence=5)
+    finder.put_syncs(events)
+    put_currents(finder, np.random.RandomState(0).normal(100, 50, len(levels)).astype(np.float32))
+    assert finder.find_sync_points() == {}
+
+
+
+def test_degenerate_sidelobes_have_no_confidence():
+    cc = np.array([1., 2., 10., 2., 1.])
+    assert SyncFinder.peak_to_sidelobe(cc, 2, 2) == 0
+    assert SyncFinder.peak_to_sidelobe(np.array([1., 1., 10., 1., 1., 1.]), 2, 1) == 0
+    assert SyncFinder.peak_to_sidelobe(np.array([1., 2., 10., 1., 2., 1.]), 2, 1) > 0
+
+
+def test_search_wo_sidelobes_is_rejected():
+    events = blinks(2, 10)
+    sync_df = prepare_sync_events(events, 10, SAMPLE_RATE)
+    # currents are as long as sync events, only a couple of lags to correlate
+    levels = currents(events, 1, sync_df.sample_offset.values[-1] + 2)
+    ts = sample_timestamps(0, len(levels), SAMPLE_RATE) + START_UTS
+    with pytest.raises(ValueError):
+        find_sync(ts, levels, sync_df, SAMPLE_RATE, min_confidence=1)
+
+def skewed_currents(head, bursts, skew):
+    """ square wave in volta time: phone event at t is seen at lag + t * (1 + skew) """
+    for i, burst in enumerate(bursts):
+        burst['sys_uts'] += (i + 1) * 35 * 10 ** 6
+        burst['log_uts'] += (i + 1) * 35 * 10 ** 6
+    events = pd.concat([head] + bursts, ignore_index=True)
+    length = (len(bursts) + 1) * 30 * SAMPLE_RATE
+    offsets = (events.sys_uts.values - START_UTS) * (1 + skew) * SAMPLE_RATE / 10 ** 6 + 40
+    levels = np.full(length, 100, dtype=np.float32)
+    for rise, fall in zip(offsets[::2].astype(int), offsets[1::2].astype(int)):
+        levels[rise:fall] = 500
+    levels += np.random.RandomState(0).normal(0, 20, length).astype(np.float32)
+    return events, levels
+
+
+def put_currents_in_real_time(finder, levels, step=5 * SAMPLE_RATE):
+    """ background searches are done long before next seconds of currents come """
+    for first in range(0, len(levels), step):
+        put_currents(finder, levels[first:first + step], first_sample=first)
+        if finder.search:
+            finder.search.join()
+
+
+@pytest.mark.parametrize('coarse_rate', [SAMPLE_RATE, SAMPLE_RATE // 4])
+def test_clock_skew_is_fitted_from_later_sync_bursts(coarse_rate):
+    skew = 2e-4  # volta box clock is 200 ppm ahead
+    events, levels = skewed_currents(blinks(5, 10), [blinks(6 + i, 10) for i in range(3)], skew)
+
+    finder = make_finder()
+    finder.coarse_rate = coarse_rate
+    finder.put_syncs(events)
+    put_currents_in_real_time(finder, levels)
+    # the last burst is complete only at the end of test
+    assert len(finder.drift_points) == 2
+    sync_points = finder.find_sync_points()
+    assert sync_points['skew_points'] == 3
+    assert sync_points['skew'] == pytest.approx(skew, abs=2e-5)
+
+
+def test_drift_tail_is_decimated():
+    finder = make_finder()
+    finder.coarse_rate = SAMPLE_RATE // 4
+    put_currents(finder, np.arange(15003, dtype=np.float32), step=7)
+    assert finder.tail_size == 2 * 10 * SAMPLE_RATE // 4
+    assert finder.tail_written == 15003 // 4
+    assert finder.tail_value[:3].tolist() == [1.5, 5.5, 9.5]
+    assert finder.tail_ts[1] - finder.tail_ts[0] == 4 * 10 ** 6 // SAMPLE_RATE
+    assert finder.tail_pending_value.tolist() == [15000, 15001, 15002]
+
+
+def test_skew_needs_two_drift_points():
+    events, levels = skewed_currents(blinks(5, 10), [blinks(6, 10)], 2e-4)
+    finder = make_finder()
+    finder.put_syncs(events)
+    put_currents_in_real_time(finder, levels)
+    sync_points = finder.find_sync_points()
+    assert len(finder.drift_points) == 1
+    assert 'sys_uts_offset' in sync_points
+    assert 'skew' not in sync_points
+
+
+def test_bursts_missing_in_currents_are_rejected():
+    head, burst = blinks(7, 10), blinks(8, 10)
+    burst['sys_uts'] += 20 * 10 ** 6
+    levels = currents(head, 0, 40 * SAMPLE_RATE) + np.random.RandomState(0).normal(0, 20, 40 * SAMPLE_RATE)
+
+    finder = make_finder()
+    finder.put_syncs(pd.concat([head, burst], ignore_index=True))
+    put_currents(finder, levels.astype(np.float32))
+    sync_points = finder.find_sync_points()
+    assert 'sys_uts_offset' in sync_points
+    assert 'skew' not in sync_points
+
+
+# sync events of a lightning app run as logcat reported them: main and system buffers interleaved,
+# so some events are duplicated and out of order
+RECORDED_SYNC_EVENTS = pd.DataFrame(
+    [
+        (1523001002150000, 2150000, 'rise'),
+        (1523001002450000, 2450000, 'fall'),
+        (1523001002150000, 2150000, 'rise'),
+        (1523001002750000, 2750000, 'rise'),
+        (1523001002450000, 2450000, 'fall'),
+        (1523001003050000, 3050000, 'fall'),
+        (1523001003151000, 3151000, 'unknown'),
+        (1523001003550000, 3550000, 'rise'),
+        (1523001003350000, 3350000, 'fall'),
+        (1523001003250000, 3250000, 'rise'),
+        (1523001004050000, 4050000, 'fall'),
+        (1523001013000000, 13000000, 'rise'),
+    ],
+    columns=['sys_uts', 'log_uts', 'message'],
+    dtype=object
+)
+
+
+def test_prepare_sync_events_sorts_and_dedupes():
+    prepared = prepare_sync_events(RECORDED_SYNC_EVENTS, 10, 10000)
+    assert prepared.sys_uts.tolist() == [
+        1523001002150000, 1523001002450000, 1523001002750000, 1523001003050000,
+        1523001003250000, 1523001003350000, 1523001003550000, 1523001004050000,
+    ]
+    assert prepared.message.tolist() == [1, 0, 1, 0, 1, 0, 1, 0]
+    assert prepared.sample_offset.tolist() == [0, 3000, 6000, 9000, 11000, 12000, 14000, 19000]
+    assert prepared.log_uts.tolist() == (prepared.sys_uts - 1523001000000000).tolist()
+
+
+def test_prepare_sync_events_keeps_different_messages_at_same_ts():
+    events = pd.DataFrame({'sys_uts': [10, 10, 5], 'log_uts': [1, 1, 0], 'message': ['fall', 'rise', 'rise']})
+    prepared = prepare_sync_events(events, 10, 1000)
+    assert prepared.message.tolist() == [1, 0, 1]
+
+
+def test_prepare_sync_events_wo_known_messages():
+    events = pd.DataFrame({'sys_uts': [10], 'log_uts': [1], 'message': ['unknown']})
+    with pytest.raises(ValueError):
+        prepare_sync_events(events, 10, 1000)
+
+
+def test_sync_w_unordered_duplicated_events():
+    events = blinks(4, 10)
+    levels = currents(events, 321, 15000)
+    noisy = pd.concat([events, events.iloc[::3]]).sample(frac=1, random_state=0)
+
+    clean, shuffled = make_finder(), make_finder()
+    clean.put_syncs(events)
+    shuffled.put_syncs(noisy)
+    put_currents(clean, levels)
+    put_currents(shuffled, levels)
+    assert shuffled.find_sync_points() == clean.find_sync_points()
+
+
+def test_parabolic_peak_interpolates_between_samples():
+    cc = -(np.arange(10) - 4.3) ** 2
+    peak, fraction = SyncFinder.parabolic_peak(cc)
+    assert peak + fraction == pytest.approx(4.3)
+
+
+def test_edges_correlation_matches_reference_signal_correlation():
+    sync = prepare_sync_events(blinks(3, 9), 10, SAMPLE_RATE)
+    sig = np.random.RandomState(0).normal(100, 50, 5000).astype(np.float32)
+    lags = np.arange(len(sig) - sync.sample_offset.values[-1] + 1)
+
+    offsets, weights = SyncFinder.ref_edges(sync)
+    expected = np.correlate(sig.astype(np.float64), SyncFinder.ref_signal(sync).astype(np.float64), mode='valid')
+    assert np.allclose(SyncFinder.correlate_edges(sig, offsets, weights, lags), expected, rtol=1e-4, atol=1)
+
+
+def late_flashes():
+    """ lightning app started 70 seconds after volta box """
+    events = blinks(9, 12)
+    events['sys_uts'] += 70 * 10 ** 6
+    levels = currents(events, 250, 100 * SAMPLE_RATE)
+    levels += np.random.RandomState(0).normal(0, 20, len(levels)).astype(np.float32)
+    return events, levels
+
+
+def test_late_flashes_are_found_by_windows_scan():
+    events, levels = late_flashes()
+    finder = make_finder(min_confidence=5)
+    finder.put_syncs(events)
+    put_currents(finder, levels)
+    assert finder.find_sync_points() == {}
+
+    ts = sample_timestamps(0, len(levels), SAMPLE_RATE) + START_UTS
+    sync_points = scan_sync_windows(ts, levels, events, SAMPLE_RATE, 10, processes=2, min_confidence=5)
+    assert abs(sync_points['sys_uts_offset'] - 250 * 10 ** 6 // SAMPLE_RATE) < 10 ** 6 // SAMPLE_RATE / 2
+    assert sync_points['sync_sample'] == pytest.approx(
+        (events.sys_uts[0] - START_UTS) * SAMPLE_RATE // 10 ** 6 + 250, abs=1
+    )
+    # 9 windows, the burst is searched only in windows it may fall into w/ clocks offset up to 10 seconds
+    assert sync_points['candidates'] == 4
+
+
+def test_windows_scan_pairs_bursts_w_windows():
+    events, levels = late_flashes()
+    ts = sample_timestamps(0, len(levels), SAMPLE_RATE) + START_UTS
+    sync_points = scan_sync_windows(ts, levels, events, SAMPLE_RATE, 10, processes=1, max_offset=0)
+    assert sync_points['candidates'] == 2
+    assert abs(sync_points['sys_uts_offset'] - 250 * 10 ** 6 // SAMPLE_RATE) < 10 ** 6 // SAMPLE_RATE / 2
+
+    # burst is far from currents
+    events['sys_uts'] += 200 * 10 ** 6
+    with pytest.raises(ValueError):
+        scan_sync_windows(ts, levels, events, SAMPLE_RATE, 10, processes=1)
+
+
+def test_read_artifacts(tmp_path):
+    events, levels = late_flashes()
+    currents_df = pd.DataFrame({'ts': sample_timestamps(0, len(levels), SAMPLE_RATE), 'value': levels})
+    log = pd.DataFrame({
+        'ts': np.concatenate([[events.sys_uts.values[0] - 10 ** 6], events.sys_uts.values]),
+        'value': ['ActivityManager: some message'] + [
+            '[volta] {} sync lightning {}'.format(log_uts * 1000, message)
+            for log_uts, message in zip(events.log_uts.values, events.message.values)
+        ],
+    })
+    meta = {'metrics': {}}
+    for name, df, metric_meta in [
+        ('metrics_1', currents_df, {'name': 'current', 'source': 'voltabox'}),
+        ('events_2', log, {'name': 'events', 'source': 'phone'}),
+    ]:
+        header = {'names': list(df.columns), 'dtypes': df.dtypes.apply(lambda x: x.name).to_dict()}
+        meta['metrics'][name] = dict(header, meta=metric_meta)
+        with open(str(tmp_path / '{}.data'.format(name)), 'w') as data_file:
+            data_file.write(json.dumps(header) + '\n')
+            df.to_csv(data_file, sep='\t', header=False, index=False)
+    with open(str(tmp_path / 'meta.json'), 'w') as meta_file:
+        json.dump(meta, meta_file)
+
+    currents_read, sync_df = read_artifacts(str(tmp_path))
+    assert np.allclose(currents_read.value.values, levels)
+    assert sync_df.sys_uts.tolist() == events.sys_uts.tolist()
+    assert sync_df.message.tolist() == events.message.tolist()
+    assert sync_df.log_uts.tolist() == (events.log_uts - events.log_uts[0]).tolist()
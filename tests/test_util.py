@@ -0,0 +1,100 @@
+import numpy as np
+
+from volta.common.runtime import ThreadRuntime
+from volta.common.util import SampleBuffer, TimeChopper, CurrentsChunk, CurrentsFanout
+
+
+def test_sample_buffer_switches_block_when_chunk_does_not_fit():
+    buf = SampleBuffer(10)
+    buf.extend(np.arange(8))
+    block = buf.block
+    assert buf.take(6).tolist() == [0, 1, 2, 3, 4, 5]
+    buf.extend(np.arange(8, 12))
+    assert buf.block is not block
+    assert buf.capacity == 10
+    assert len(buf) == 6
+    assert buf.take(6).tolist() == [6, 7, 8, 9, 10, 11]
+
+
+def test_sample_buffer_grows_for_chunk_larger_than_capacity():
+    buf = SampleBuffer(4)
+    buf.extend(np.arange(3))
+    buf.extend(np.arange(3, 13))
+    assert buf.capacity == 13
+    assert buf.take(13).tolist() == list(range(13))
+
+
+def test_slices_are_unchanged_after_block_switch():
+    buf = SampleBuffer(10)
+    buf.extend(np.arange(10))
+    first = buf.take(5)
+    buf.extend(np.arange(10, 18))
+    second = buf.take(10)
+    buf.extend(np.arange(18, 28))
+    assert first.tolist() == [0, 1, 2, 3, 4]
+    assert second.tolist() == list(range(5, 15))
+
+
+def chop(chunks, sample_rate=10, chop_ratio=1.0):
+    return list(TimeChopper(iter(chunks), sample_rate, chop_ratio))
+
+
+def test_chopper_emits_full_slices_and_flushes_partial_one():
+    slices = chop([np.arange(7, dtype=np.float32), np.arange(7, 25, dtype=np.float32)])
+    assert [len(chunk) for chunk in slices] == [10, 10, 5]
+    assert np.concatenate([chunk.value for chunk in slices]).tolist() == list(range(25))
+    assert slices[-1].ts.tolist() == [2000000, 2100000, 2200000, 2300000, 2400000]
+
+
+def test_chopper_emits_slice_as_soon_as_it_is_full():
+    chopper = iter(TimeChopper(iter([np.arange(10, dtype=np.float32)]), 10))
+    assert len(next(chopper)) == 10
+    # exact multiple of slice size, nothing left to flush
+    assert list(chopper) == []
+
+
+def test_chopper_slices_survive_buffer_block_switches():
+    chunks = [np.arange(i * 7, (i + 1) * 7, dtype=np.float32) for i in range(100)]
+    slices = chop(chunks)
+    assert np.concatenate([chunk.value for chunk in slices]).tolist() == list(range(700))
+    assert all(len(chunk) == 10 for chunk in slices)
+
+
+def test_timestamps_dont_drift_at_3000_sps():
+    sample_rate = 3000
+    rnd = np.random.RandomState(0)
+    # ~100 seconds of data in chunks of random size, chopped to slices of 428 samples
+    sizes = rnd.randint(1, 2000, 300)
+    chunks = np.split(np.zeros(sizes.sum(), dtype=np.float32), np.cumsum(sizes)[:-1])
+    slices = list(TimeChopper(iter(chunks), sample_rate, 1 / 7.))
+    ts = np.concatenate([chunk.ts for chunk in slices])
+    samples = np.arange(sizes.sum(), dtype=np.int64)
+    assert len(slices) > 500
+    assert np.array_equal(ts, samples * 10 ** 6 // sample_rate)
+
+
+class Metric(object):
+    def __init__(self):
+        self.dfs = []
+
+    def put(self, df):
+        self.dfs.append(df)
+
+
+def test_failed_listener_doesnt_stop_drain():
+    calls = []
+
+    def broken(chunk):
+        calls.append('broken')
+        raise ValueError('bad input')
+
+    received = []
+    metric = Metric()
+    chunks = [CurrentsChunk(np.arange(3, dtype=np.int64) + i, np.ones(3, dtype=np.float32)) for i in range(5)]
+    drain = ThreadRuntime().drain(chunks, CurrentsFanout(metric, [broken, received.append]))
+    drain.start()
+    drain.join(5)
+    assert not drain.is_alive()
+    assert received == chunks
+    assert len(metric.dfs) == 5
+    assert calls == ['broken']
@@ -81,8 +81,10 @@ def perform_test(configs, log):
         logger.info('Starting test... You can interrupt test w/ Ctrl+C or SIGTERM signal')
         core.start_test()
 
-        while True:
-            time.sleep(1)  # infinite loop until SIGTERM
+        while not core.is_finished():
+            time.sleep(1)  # infinite loop until SIGTERM or the end of volta data source
+        logger.info('Volta data source exhausted, finishing test...')
+        core.end_test()
 
     except KeyboardInterrupt:
         logger.info('Keyboard interrupt, trying graceful shutdown. Do not press interrupt again, '
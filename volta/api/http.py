@@ -63,7 +63,7 @@ class GetTestInfoHandler(tornado.web.RequestHandler):
         global active_test
         if active_test:
             self.core = active_test
-            self.write(json.dumps(self.core.get_current_test_info()))
+            self.write(json.dumps(self.core.get_current_test_info(per_module=True)))
         else:
             self.set_status(404)
             self.write('There are no active tests\n')
@@ -15,6 +15,10 @@ class VoltaBox(object):
                 may be path to file, e.g. '/home/users/netort/path/to/file.data'
             self.chop_ratio (int): chop ratio for incoming data, 1 means 1 second (500 for sample_rate 500)
             self.grab_timeout (int): timeout for grabber
+            self.read_latency (float): latency budget for grabber reads, seconds
+            self.acquisition (string): where to read data source, `thread` - in grabber thread,
+                `process` - in dedicated process, grabber reads its data from shared memory
+            self.acquisition_buffer (int): shared memory buffer size for acquisition process, seconds of data
             self.sample_rate (int): volta box sample rate - depends on software and which type of volta box you use
             self.baud_rate (int): baud rate for device if device specified in source
         """
@@ -25,9 +29,12 @@ class VoltaBox(object):
         self.process_currents = None
         self.reader = None
 
-        self.source = config.get_option('volta', 'source')
+        self.source = self._source_path(config)
         self.chop_ratio = config.get_option('volta', 'chop_ratio')
         self.grab_timeout = config.get_option('volta', 'grab_timeout')
+        self.read_latency = config.get_option('volta', 'read_latency')
+        self.acquisition = config.get_option('volta', 'acquisition', 'thread')
+        self.acquisition_buffer = config.get_option('volta', 'acquisition_buffer', 60)
         self.slope = config.get_option('volta', 'slope')
         self.offset = config.get_option('volta', 'offset')
         self.precision = config.get_option('volta', 'precision')
@@ -40,6 +47,10 @@ class VoltaBox(object):
         except Exception:
             raise RuntimeError('Device %s not found. Please check VoltaBox USB connection', self.source)
 
+    def _source_path(self, config):
+        """ Path to data source """
+        return config.get_option('volta', 'source')
+
     def start_test(self, results):
         """ Grab stage - starts grabber thread and puts data to results queue
 
@@ -52,6 +63,10 @@ class VoltaBox(object):
         """ end test """
         raise NotImplementedError("Abstract method needs to be overridden")
 
+    def is_finished(self):
+        """ Data source is exhausted, live boxes never finish by themselves """
+        return False
+
     def get_info(self):
         raise NotImplementedError("Abstract method needs to be overridden")
 
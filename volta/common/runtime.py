@@ -0,0 +1,282 @@
+""" Execution runtimes: how grabbers, log readers and periodic tasks of modules are run
+
+ThreadRuntime is the default, every pipeline is a thread of its own. AsyncRuntime runs all of them as coroutines
+on one asyncio event loop, w/ blocking reads and CPU-heavy decoding offloaded to a shared thread pool,
+subprocess pipes are read by the loop itself, and all tasks are stopped deterministically on close.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from netort.data_processing import Drain
+
+from volta.common.util import Executioner
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicThread(threading.Thread):
+    """ Calls target every interval seconds in a daemon thread, until closed """
+
+    def __init__(self, target, interval):
+        super(PeriodicThread, self).__init__()
+        self.target = target
+        self.interval = interval
+        self._interrupted = threading.Event()
+        self.setDaemon(True)
+
+    def run(self):
+        while not self._interrupted.is_set():
+            try:
+                self.target()
+            except Exception:
+                logger.error('Periodic task %s failed', self.target, exc_info=True)
+            self._interrupted.wait(self.interval)
+
+    def close(self):
+        self._interrupted.set()
+
+
+class ThreadRuntime(object):
+    """ Default runtime, one thread per pipeline """
+
+    def drain(self, source, destination):
+        """ Drain generator to destination, caller starts it """
+        return Drain(source, destination)
+
+    def executioner(self, cmd, **kwargs):
+        return Executioner(cmd, **kwargs)
+
+    def periodic(self, target, interval):
+        """ Started periodic task, answers to close() """
+        task = PeriodicThread(target, interval)
+        task.start()
+        return task
+
+    def close(self, timeout=10):
+        pass
+
+
+class AsyncTask(object):
+    """ Coroutine on the runtime loop w/ thread-like interface: start(), close(), join(), is_alive() """
+
+    def __init__(self, runtime):
+        self.runtime = runtime
+        self.future = None
+        self._interrupted = threading.Event()
+
+    async def run(self):
+        raise NotImplementedError("Abstract method needs to be overridden")
+
+    def start(self):
+        self.future = self.runtime.submit(self.run())
+
+    def close(self):
+        self._interrupted.set()
+
+    def join(self, timeout=None):
+        if self.future is None:
+            return
+        try:
+            self.future.result(timeout)
+        except FutureTimeoutError:
+            pass
+        except Exception:
+            logger.debug('Task %s failed', self, exc_info=True)
+
+    def is_alive(self):
+        return self.future is not None and not self.future.done()
+
+
+class AsyncDrain(AsyncTask):
+    """ Drain generator to a destination that answers to put(), each step runs in runtime executor """
+    _STOP = object()
+
+    def __init__(self, runtime, source, destination):
+        super(AsyncDrain, self).__init__(runtime)
+        self.source = source
+        self.destination = destination
+
+    def _step(self, iterator):
+        item = next(iterator, self._STOP)
+        if item is not self._STOP:
+            self.destination.put(item)
+        return item
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        iterator = iter(self.source)
+        try:
+            while not self._interrupted.is_set():
+                if await loop.run_in_executor(self.runtime.executor, self._step, iterator) is self._STOP:
+                    break
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.error('Drain of %s failed', self.source, exc_info=True)
+
+
+class AsyncPeriodic(AsyncTask):
+    """ Calls target in runtime executor every interval seconds, until closed """
+
+    def __init__(self, runtime, target, interval):
+        super(AsyncPeriodic, self).__init__(runtime)
+        self.target = target
+        self.interval = interval
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while not self._interrupted.is_set():
+            try:
+                await loop.run_in_executor(self.runtime.executor, self.target)
+            except Exception:
+                logger.error('Periodic task %s failed', self.target, exc_info=True)
+            await asyncio.sleep(self.interval)
+
+
+class AsyncExecutioner(Executioner):
+    """ Executioner w/ subprocess pipes read by the runtime loop, no reader threads
+
+    Lines are put to the same thread-safe queues as Executioner does, so consumers don't change.
+    """
+
+    def __init__(self, runtime, cmd, **kwargs):
+        super(AsyncExecutioner, self).__init__(cmd, **kwargs)
+        self.runtime = runtime
+        self.readers = []
+
+    def execute(self):
+        self.runtime.call(self.__start())
+        return self.out_queue, self.errors_queue
+
+    async def __start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            *self.cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, close_fds=True
+        )
+        self.readers = [
+            asyncio.ensure_future(self.__read_stream(self.process.stdout, self.out_queue)),
+            asyncio.ensure_future(self.__read_stream(self.process.stderr, self.errors_queue)),
+        ]
+
+    async def __read_stream(self, stream, destination):
+        partial = []
+        while True:
+            data = await stream.read(self.read_size)
+            if not data:
+                break
+            self._put_lines(destination, partial, data)
+        if partial:
+            self._put(destination, [b''.join(partial)])
+
+    def is_finished(self):
+        return self.process.returncode
+
+    async def __stop(self):
+        if self.process.returncode is None:
+            logger.debug('Executioner got close signal, but the process \'%s\' is still alive, killing...', self.cmd)
+            self.process.terminate()
+            await self.process.wait()
+        await asyncio.gather(*self.readers, return_exceptions=True)
+
+    def close(self):
+        if self.process and not self.closed:
+            self.runtime.call(self.__stop())
+        self.closed = True
+
+
+class AsyncRuntime(object):
+    """ Runs modules pipelines as coroutines on one event loop in a dedicated thread
+
+    Args:
+        workers (int): executor size for blocking reads, decoding and listeners
+
+    Attributes:
+        loop: asyncio event loop
+        executor (ThreadPoolExecutor): shared executor for blocking calls
+        spare_workers (int): workers for short tasks, besides pipelines ones, see make_runtime()
+    """
+    spare_workers = 4
+
+    def __init__(self, workers=None):
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='volta-runtime')
+        self.loop.set_default_executor(self.executor)
+        self.thread = threading.Thread(target=self.__run_loop, name='volta-runtime-loop')
+        self.thread.setDaemon(True)
+        self.thread.start()
+
+    def __run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        """ Schedule coroutine on the loop, concurrent.futures.Future of its result """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call(self, coro, timeout=None):
+        """ Run coroutine on the loop and wait for its result """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def drain(self, source, destination):
+        return AsyncDrain(self, source, destination)
+
+    def executioner(self, cmd, **kwargs):
+        return AsyncExecutioner(self, cmd, **kwargs)
+
+    def periodic(self, target, interval):
+        task = AsyncPeriodic(self, target, interval)
+        task.start()
+        return task
+
+    async def __cancel_tasks(self, timeout):
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        if not tasks:
+            return
+        logger.info('Cancelling %s runtime tasks still running', len(tasks))
+        for task in tasks:
+            task.cancel()
+        await asyncio.wait(tasks, timeout=timeout)
+
+    def close(self, timeout=10):
+        """ Cancel tasks still running, wait for them, stop the loop and shut down the executor
+
+        Blocking calls already running in executor can't be cancelled, modules should close their readers first.
+        """
+        if self.loop.is_closed():
+            return
+        try:
+            self.call(self.__cancel_tasks(timeout), timeout + 1)
+        except FutureTimeoutError:
+            logger.warning('Runtime tasks were not cancelled in %s seconds', timeout)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if not self.thread.is_alive():
+            self.loop.close()
+
+
+def make_runtime(name, workers=None, pipelines=0):
+    """ Runtime by config name: thread or asyncio
+
+    Every box grabber, phone log reader and periodic task holds a worker of asyncio runtime while it waits
+    for data, so executor is sized for all of them plus `spare_workers`, smaller executor is a config error
+
+    Args:
+        name (string): thread or asyncio
+        workers (int): asyncio runtime executor size, None to size it by pipelines
+        pipelines (int): amount of pipelines blocking workers
+    """
+    if name == 'asyncio':
+        if workers is None:
+            workers = pipelines + AsyncRuntime.spare_workers
+        elif workers < pipelines:
+            raise RuntimeError(
+                'runtime_workers {} is less than {} pipelines, box reads would wait for log readers'.format(
+                    workers, pipelines
+                )
+            )
+        return AsyncRuntime(workers)
+    elif name == 'thread':
+        return ThreadRuntime()
+    raise RuntimeError('Unknown runtime: {}'.format(name))
@@ -6,8 +6,12 @@ import subprocess
 import shlex
 import time
 import datetime
+import calendar
 import queue
 import re
+import os
+import selectors
+from concurrent.futures import ThreadPoolExecutor
 
 from netort.data_processing import get_nowait_from_queue
 
@@ -15,18 +19,126 @@ from netort.data_processing import get_nowait_from_queue
 logger = logging.getLogger(__name__)
 
 
+class SampleBuffer(object):
+    """
+    Preallocated fixed-capacity sample buffer, slices are taken w/o copying
+
+    Taken slices are views of the underlying block and may be still in use by
+    listeners in other threads, so a block is never rewritten: when there is no
+    room left for incoming chunk, only pending samples are moved to a new block.
+    Every sample is copied once on write and at most once more on block switch.
+    """
+
+    def __init__(self, capacity, dtype=np.float64):
+        self.capacity = capacity
+        self.dtype = dtype
+        self.block = np.empty(self.capacity, dtype=self.dtype)
+        self.head = 0
+        self.tail = 0
+
+    def __len__(self):
+        return self.tail - self.head
+
+    def extend(self, chunk):
+        """ Copy chunk to the end of buffer """
+        size = len(chunk)
+        if self.tail + size > self.capacity:
+            pending = len(self)
+            self.capacity = max(self.capacity, pending + size)
+            block = np.empty(self.capacity, dtype=self.dtype)
+            block[:pending] = self.block[self.head:self.tail]
+            self.block, self.head, self.tail = block, 0, pending
+        self.block[self.tail:self.tail + size] = chunk
+        self.tail += size
+
+    def take(self, size):
+        """ Take `size` samples from the head of buffer, returns view """
+        ready = self.block[self.head:self.head + size]
+        self.head += size
+        return ready
+
+
+class CurrentsChunk(object):
+    """ Columnar chunk of electrical currents
+
+    Attributes:
+        ts (numpy.array): int64 sample timestamps, microseconds
+        value (numpy.array): float32 sample values
+    """
+    __slots__ = ('ts', 'value')
+
+    def __init__(self, ts, value):
+        self.ts = ts
+        self.value = value
+
+    def __len__(self):
+        return len(self.value)
+
+    def to_df(self):
+        """ Make pandas.DataFrame, fmt: ['ts', 'value'] """
+        return pd.DataFrame(data={'ts': self.ts, 'value': self.value}, columns=['ts', 'value'])
+
+
+class CurrentsFanout(object):
+    """ Destination for currents chunks
+
+    Listeners (callables) receive chunks as is, dataframe for data session metric is made only once per chunk.
+    Listeners run in grabber thread, so a failed listener is logged and disabled, grabbing goes on
+
+    Args:
+        metric: data session metric, answers to put(df)
+        listeners (list): callables, receive CurrentsChunk
+
+    Attributes:
+        failed_listeners (list): listeners disabled after an exception
+    """
+
+    def __init__(self, metric, listeners):
+        self.metric = metric
+        self.listeners = listeners
+        self.failed_listeners = []
+
+    def put(self, chunk):
+        for listener in self.listeners:
+            if listener in self.failed_listeners:
+                continue
+            try:
+                listener(chunk)
+            except Exception:
+                logger.error('Currents listener %s failed, disabled till the end of test', listener, exc_info=True)
+                self.failed_listeners.append(listener)
+        self.metric.put(chunk.to_df())
+
+
+def sample_timestamps(first_sample, count, sample_rate):
+    """ Timestamps of `count` samples starting from sample number `first_sample`
+
+    Timestamps are calculated from sample numbers w/ integer arithmetic, so there is no drift
+    for sample rates which don't divide 10**6 (e.g. 3000 sps), only sub-microsecond truncation
+
+    Returns:
+        numpy.array of int64, offsets from the first sample in microseconds
+    """
+    samples = np.arange(first_sample, first_sample + count, dtype=np.int64)
+    return (samples * 10 ** 6 // sample_rate).astype(np.int64, copy=False)
+
+
 class TimeChopper(object):
     """
-    Group incoming chunks into dataframe by sample rate w/ chop_ratio
-    adds utc timestamp from start test w/ offset and assigned frequency
+    Group incoming chunks into CurrentsChunk by sample rate w/ chop_ratio
+    adds timestamp from start test calculated from sample number and sample rate
+
+    Attributes:
+        buffer_slices (int): buffer capacity in slices
     """
+    buffer_slices = 16
 
     def __init__(self, source, sample_rate, chop_ratio=1.0):
         self.source = source
         self.sample_rate = sample_rate
-        self.buffer = np.array([])
         self.chop_ratio = chop_ratio
-        self.slice_size = int(self.sample_rate*self.chop_ratio)
+        self.slice_size = max(int(self.sample_rate*self.chop_ratio), 1)
+        self.buffer = SampleBuffer(self.slice_size * self.buffer_slices, dtype=np.float32)
 
     def __iter__(self):
         logger.debug('Chopper slicing data w/ %s ratio, slice size will be %s', self.chop_ratio, self.slice_size)
@@ -35,39 +147,116 @@ class TimeChopper(object):
             # exec_time_start = time.time()
             if chunk is not None:
                 logger.debug('Chopper got %s data', len(chunk))
-                self.buffer = np.append(self.buffer, chunk)
-                while len(self.buffer) > self.slice_size:
-                    ready_sample = self.buffer[:self.slice_size]
-                    self.buffer = self.buffer[self.slice_size:]
-                    df = pd.DataFrame(data=ready_sample, columns=['value'])
-                    idx = "{value}{units}".format(
-                        value = int(10 ** 6 / self.sample_rate),
-                        units = "us"
-                    )
-                    # add time offset to start time in order to determine current timestamp and make date_range for df
-                    current_ts = int((sample_num * (1./self.sample_rate)) * 10 ** 9)
-                    df.loc[:, ('ts')] = pd.date_range(
-                        current_ts, periods=len(ready_sample), freq=idx
-                    ).astype(np.int64) // 1000
-                    sample_num = sample_num + len(ready_sample)
-                    yield df
+                self.buffer.extend(chunk)
+                while len(self.buffer) >= self.slice_size:
+                    yield self.__make_chunk(sample_num, self.slice_size)
+                    sample_num = sample_num + self.slice_size
             # logger.debug('Chopping took %s time', time.time() - exec_time_start)
+        # source exhausted, flush the rest
+        if len(self.buffer):
+            yield self.__make_chunk(sample_num, len(self.buffer))
+
+    def __make_chunk(self, sample_num, size):
+        return CurrentsChunk(sample_timestamps(sample_num, size, self.sample_rate), self.buffer.take(size))
+
+
+class GrabberCounters(object):
+    """ Grabber pipeline throughput counters
+
+    Compares received samples w/ amount of samples the box should have sent since the start of grabbing,
+    so the host falling behind the box (serial overruns, lost bytes) is noticed during the test
+
+    Attributes:
+        lag_warning (float): warn if more than this amount of seconds of samples are lost
+        warning_interval (int): min interval between warnings, seconds
+    """
+    lag_warning = 1.0
+    warning_interval = 10
+
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self.start_ts = time.time()
+        self.bytes = 0
+        self.samples = 0
+        self.chunks = 0
+        self.queue_depth = 0
+        self.bad_lines = 0
+        self.last_warning_ts = 0
+
+    def update(self, length, samples, queue_depth=0, bad_lines=0):
+        """
+        Args:
+            length (int): bytes received
+            samples (int): samples received
+            queue_depth (int): samples waiting to be read (in serial device buffer, shared memory etc)
+            bad_lines (int): malformed lines dropped by text readers
+        """
+        self.bytes += length
+        self.samples += samples
+        self.chunks += 1
+        self.queue_depth = queue_depth
+        self.bad_lines += bad_lines
+        now = time.time()
+        lost = self.lost_samples(now)
+        if lost > self.sample_rate * self.lag_warning and now - self.last_warning_ts > self.warning_interval:
+            self.last_warning_ts = now
+            logger.warning(
+                'Grabber is behind the box: %s samples lost or delayed, %s samples received, %s expected',
+                lost, self.samples, self.expected_samples(now)
+            )
+
+    def expected_samples(self, now):
+        return int(self.sample_rate * (now - self.start_ts))
+
+    def lost_samples(self, now):
+        return max(self.expected_samples(now) - self.samples - self.queue_depth, 0)
+
+    def get_info(self):
+        now = time.time()
+        elapsed = max(now - self.start_ts, 10 ** -6)
+        return {
+            'elapsed': elapsed,
+            'bytes': self.bytes,
+            'bytes_per_second': self.bytes / elapsed,
+            'chunks': self.chunks,
+            'chunks_per_second': self.chunks / elapsed,
+            'samples': self.samples,
+            'expected_samples': self.expected_samples(now),
+            'lost_samples': self.lost_samples(now),
+            'queue_depth': self.queue_depth,
+            'bad_lines': self.bad_lines,
+        }
 
 
 class Executioner(object):
-    """ Process executioner and pipe reader """
+    """ Process executioner and pipe reader
+
+    Both stdout and stderr are read by a single selector thread in large non-blocking blocks, so there is no
+    per-line read and no polling. Lines are split in bulk; in batch mode all complete lines of a block are put
+    to queue as one list, so consumers get one wakeup per block instead of one per line.
+
+    Args:
+        cmd (string): command line
+        batch (bool): put lists of lines to queues instead of single lines
+        read_size (int): max bytes read from a pipe at once
+
+    Attributes:
+        out_queue (queue.Queue): stdout lines (bytes, w/ trailing newline) or lists of lines in batch mode
+        errors_queue (queue.Queue): stderr lines or lists of lines
+    """
     def __init__(
-            self, cmd, terminate_if_errors=False, shell=False
+            self, cmd, terminate_if_errors=False, shell=False, batch=False, read_size=65536
     ):
         self.cmd = shlex.split(cmd)
         self.terminate_if_errors = terminate_if_errors
         self.process = None
         self.shell = shell
+        self.batch = batch
+        self.read_size = read_size
         self.out_queue = queue.Queue()
         self.errors_queue = queue.Queue()
         self.closed = False
-        self.process_out_reader = None
-        self.process_err_reader = None
+        self.process_reader = None
 
     def execute(self):
         self.process = subprocess.Popen(
@@ -77,33 +266,62 @@ class Executioner(object):
             stdout=subprocess.PIPE,
             close_fds=True
         )
-        self.process_out_reader = threading.Thread(
-            target=self.__read_pipe, args=(self.process.stdout, self.out_queue)
-        )
-        self.process_out_reader.setDaemon(True)
-        self.process_err_reader = threading.Thread(
-            target=self.__read_pipe, args=(self.process.stderr, self.errors_queue)
-        )
-        self.process_err_reader.setDaemon(True)
-        self.process_out_reader.start()
-        self.process_err_reader.start()
+        self.process_reader = threading.Thread(target=self.__read_pipes)
+        self.process_reader.setDaemon(True)
+        self.process_reader.start()
         return self.out_queue, self.errors_queue
 
     def is_finished(self):
         return self.process.poll()
 
-    def __read_pipe(self, source, destination):
-        while not self.closed:
-            try:
-                data = source.readline()
-            except ValueError:
-                logger.warning('Executioner %s pipe unexpectedly closed: %s', self.cmd, source, exc_info=True)
-                self.close()
-            else:
-                if data:
-                    destination.put(data)
-                else:
-                    time.sleep(1)
+    def __read_pipes(self):
+        selector = selectors.DefaultSelector()
+        for source, destination in [(self.process.stdout, self.out_queue), (self.process.stderr, self.errors_queue)]:
+            os.set_blocking(source.fileno(), False)
+            # partial last line of a block waits for the rest of it in `partial` list
+            selector.register(source.fileno(), selectors.EVENT_READ, (destination, []))
+        try:
+            while selector.get_map() and not self.closed:
+                for key, _ in selector.select(timeout=0.5):
+                    destination, partial = key.data
+                    try:
+                        data = os.read(key.fd, self.read_size)
+                    except BlockingIOError:
+                        continue
+                    except OSError:
+                        logger.warning('Executioner %s pipe unexpectedly closed', self.cmd, exc_info=True)
+                        data = b''
+                    if data:
+                        self._put_lines(destination, partial, data)
+                    else:
+                        # EOF, the rest of data is the last line w/o newline
+                        if partial:
+                            self._put(destination, [b''.join(partial)])
+                        selector.unregister(key.fd)
+        finally:
+            selector.close()
+
+    def _put_lines(self, destination, partial, data):
+        last_newline = data.rfind(b'\n')
+        if last_newline < 0:
+            partial.append(data)
+            return
+        if partial:
+            partial.append(data[:last_newline + 1])
+            block = b''.join(partial)
+            del partial[:]
+        else:
+            block = data[:last_newline + 1]
+        if last_newline + 1 < len(data):
+            partial.append(data[last_newline + 1:])
+        self._put(destination, [line + b'\n' for line in block[:-1].split(b'\n')])
+
+    def _put(self, destination, lines):
+        if self.batch:
+            destination.put(lines)
+        else:
+            for line in lines:
+                destination.put(line)
 
     def close(self):
         if self.process:
@@ -112,11 +330,82 @@ class Executioner(object):
                 self.process.terminate()
                 self.process.wait()
         self.closed = True
-        self.process_out_reader.join()
-        self.process_err_reader.join()
+        if self.process_reader:
+            self.process_reader.join()
+
+
+class CommandPool(object):
+    """ Bounded pool of concurrent short-lived commands, e.g. adb installs
+
+    Each command is waited for by its own pool worker, so its result is ready as soon as the process exits.
+
+    Args:
+        workers (int): max commands running at once
+        timeout (float): max command run time, seconds, None for no limit
+
+    Attributes:
+        timings (list): finished commands, fmt: {'cmd', 'retcode', 'elapsed'}, retcode is None if command
+            timed out or failed to start
+    """
+
+    def __init__(self, workers=4, timeout=None):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='volta-commands')
+        self.timeout = timeout
+        self.timings = []
+        self.lock = threading.Lock()
+
+    def __execute(self, cmd):
+        start_time = time.time()
+        try:
+            process = subprocess.run(
+                shlex.split(cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=self.timeout
+            )
+        except subprocess.TimeoutExpired as exc:
+            retcode, stdout, stderr = None, exc.stdout or b'', exc.stderr or b''
+        except OSError as exc:
+            retcode, stdout, stderr = None, b'', str(exc).encode('utf-8')
+        else:
+            retcode, stdout, stderr = process.returncode, process.stdout, process.stderr
+        result = {'cmd': cmd, 'retcode': retcode, 'elapsed': time.time() - start_time}
+        with self.lock:
+            self.timings.append(result)
+        for line in stdout.splitlines():
+            logger.debug('Command \'%s\' output: %s', cmd, line.strip())
+        for line in stderr.splitlines():
+            logger.warning('Errors in command \'%s\' output: %s', cmd, line.strip())
+        logger.info('Command \'%s\' executed in %.2fs. Retcode: %s', cmd, result['elapsed'], retcode)
+        return dict(result, stdout=stdout)
+
+    def submit(self, cmd):
+        """ concurrent.futures.Future of command result, fmt: {'cmd', 'retcode', 'elapsed', 'stdout'} """
+        return self.executor.submit(self.__execute, cmd)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
 
 
 class LogParser(object):
+    """ Parses log lines from source queue, emits one DataFrame per batch of log entries
+
+    Multiline log entries are concatenated: lines that don't match log format regexp are appended to
+    previous entry, so the last entry is held until the next one starts.
+
+    If prefilter substrings are set, raw lines w/o any of them are dropped before decoding and regexp matching,
+    so parsing cost scales w/ relevant events, not w/ total log volume. Continuation lines of multiline entries
+    are subject to prefilter as well.
+
+    Args:
+        source (queue.Queue): log lines or lists of log lines, e.g. from Executioner in batch mode
+        log_fmt_regexp: compiled log format regexp
+        phone_type (string): android or iphone, defines timestamp format
+        batch_size (int): max amount of log entries in a DataFrame
+        batch_interval (float): max time log entries wait in a batch, seconds
+        prefilter (list): substrings, log lines w/o any of them are dropped, e.g. ['[volta]']
+
+    Returns:
+        pandas.DataFrame, indexed by ts, fmt: log format regexp groups + ['ts', 'sys_uts'],
+            + ['custom_metric_type', 'tag', 'message', 'log_uts'] for volta custom events (None for others)
+    """
     # data sample: [volta] 12345678 fragment TagFragment start
     # following regexp grabs 'nanotime', 'type', 'tag' and 'message' from sample above
     volta_custom_event = re.compile(
@@ -135,7 +424,9 @@ class LogParser(object):
         """, re.VERBOSE | re.IGNORECASE
     )
 
-    def __init__(self, source, log_fmt_regexp, phone_type, cache_size=10):
+    def __init__(
+            self, source, log_fmt_regexp, phone_type, cache_size=10, batch_size=1000, batch_interval=1.0,
+            prefilter=None):
         self.closed = False
         self.source = source
         self.log_fmt_regexp = log_fmt_regexp
@@ -144,14 +435,41 @@ class LogParser(object):
         self.cache_size = cache_size
         self.log_uts_start = None
         self.sys_uts_start = None
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.batch = {}
+        self.batch_len = 0
+        self.batch_start = None
+        self.timestamp_parser = LogTimestampParser(phone_type)
+        self.prefilter = list(prefilter or [])
+        self.prefilter_bytes = [pattern.encode('utf-8') for pattern in self.prefilter]
+        self.prefiltered = 0
+        # max wait for new lines, bounds close and batch interval flush latency
+        self.read_timeout = 0.5
+
+    def __read_lines(self):
+        """ Wait for lines in source queue, then take all available. Queue items are lines or lists of lines """
+        try:
+            data = [self.source.get(timeout=self.read_timeout)]
+        except queue.Empty:
+            return []
+        data.extend(get_nowait_from_queue(self.source))
+        lines = []
+        for item in data:
+            if isinstance(item, list):
+                lines.extend(item)
+            else:
+                lines.append(item)
+        return lines
 
     def _read_chunk(self):
-        data = get_nowait_from_queue(self.source)
-        if not data:
-            time.sleep(1)
-        else:
+        data = self.__read_lines()
+        if data:
             ready_to_go_chunks = []
             for chunk in data:
+                if self.prefilter and not self.__prefilter_match(chunk):
+                    self.prefiltered += 1
+                    continue
                 if isinstance(chunk, bytes):
                     chunk = chunk.decode('utf-8')  # not sure if this is a good practice
                 match = self.log_fmt_regexp.match(chunk)
@@ -170,66 +488,89 @@ class LogParser(object):
                         self.buffer[0]['value'] = self.buffer[0]['value'] + str(chunk)
             return ready_to_go_chunks
 
+    def __prefilter_match(self, chunk):
+        """ Raw log line contains any of prefilter substrings """
+        for pattern in self.prefilter_bytes if isinstance(chunk, bytes) else self.prefilter:
+            if pattern in chunk:
+                return True
+        return False
+
+    def close(self):
+        """ Stop iteration, pending batch is emitted """
+        self.closed = True
+
     def __iter__(self):
         while not self.closed:
             log_entries = self._read_chunk()
-            if log_entries:
-                for log_entry in log_entries:
-                    # exec_time_start = time.time()
-                    try:
-                        ts = self.__parse_timestamp(log_entry, self.phone_type)
-                        if ts:
-                            if not self.sys_uts_start:
-                                log_entry['ts'] = 0
-                                self.sys_uts_start = ts
-                            else:
-                                log_entry['ts'] = ts - self.sys_uts_start
-                        else:
-                            logger.debug('Timestamp of log entry malformed? %s', log_entry)
-                            continue
-                    except ValueError:
-                        continue
-                    else:
-                        log_entry = self.__parse_custom_message(log_entry)
-                        log_entry['sys_uts'] = log_entry['ts']
-                        log_entry['value'] = log_entry['value']\
-                            .replace('\t', '__tab__') \
-                            .replace('\n', '__nl__') \
-                            .replace('\r', '') \
-                            .replace('\f', '') \
-                            .replace('\v', '')
-                        df = pd.DataFrame(
-                            data={
-                                log_entry['ts']:
-                                    log_entry
-                            },
-                        ).T
-                        df.loc[:, ('value')] = df['value'].astype(np.str)
-                        yield df
-                    # logger.debug('log event parsing took %s time', time.time() - exec_time_start)
-            else:
-                time.sleep(0.5)
-
-    @staticmethod
-    def __parse_timestamp(log_entry, phone_type):
-        """ split chunks by LF, parse contents and create dataframes
+            for log_entry in log_entries or []:
+                log_entry = self.__parse_entry(log_entry)
+                if log_entry:
+                    self.__add_to_batch(log_entry)
+                    if self.batch_len >= self.batch_size:
+                        yield self.__flush_batch()
+            if self.batch_len and time.time() - self.batch_start >= self.batch_interval:
+                yield self.__flush_batch()
+        if self.batch_len:
+            yield self.__flush_batch()
+
+    def __parse_entry(self, log_entry):
+        """ Rebase timestamp, parse custom message and escape value. None for malformed timestamps """
+        try:
+            ts = self.__parse_timestamp(log_entry)
+        except ValueError:
+            return
+        if not ts:
+            logger.debug('Timestamp of log entry malformed? %s', log_entry)
+            return
+        if not self.sys_uts_start:
+            log_entry['ts'] = 0
+            self.sys_uts_start = ts
+        else:
+            log_entry['ts'] = ts - self.sys_uts_start
+        log_entry = self.__parse_custom_message(log_entry)
+        log_entry['sys_uts'] = log_entry['ts']
+        log_entry['value'] = log_entry['value']\
+            .replace('\t', '__tab__') \
+            .replace('\n', '__nl__') \
+            .replace('\r', '') \
+            .replace('\f', '') \
+            .replace('\v', '')
+        return log_entry
+
+    def __add_to_batch(self, log_entry):
+        """ Append log entry to batch column lists, columns missing in entry or in batch are padded w/ None """
+        if not self.batch_len:
+            self.batch_start = time.time()
+        for key, value in log_entry.items():
+            column = self.batch.get(key)
+            if column is None:
+                column = self.batch[key] = [None] * self.batch_len
+            column.append(value)
+        self.batch_len += 1
+        for column in self.batch.values():
+            if len(column) < self.batch_len:
+                column.append(None)
+
+    def __flush_batch(self):
+        df = pd.DataFrame(self.batch, index=self.batch['ts'])
+        df['value'] = df['value'].astype(str)
+        self.batch = {}
+        self.batch_len = 0
+        return df
+
+    def __parse_timestamp(self, log_entry):
+        """ Log entry timestamp, microseconds
 
         Args:
-            data (string): chunk of data read from source
+            log_entry (dict): log format regexp groups
         Returns:
-            pandas.DataFrame, fmt: ['sys_uts', 'message']
+            int, None for malformed timestamps
         """
-        formatter = {
-            'android': format_ts_from_android,
-            'iphone': format_ts_from_iphone
-        }
         try:
-            ts = formatter[phone_type](log_entry)
-        except (ValueError, IndexError):
+            return self.timestamp_parser(log_entry)
+        except (ValueError, IndexError, TypeError):
             logger.debug('Malformed data in logs: %s', log_entry, exc_info=True)
             return
-        else:
-            return int((ts - datetime.datetime(1970, 1, 1)).total_seconds() * 10 ** 6)
 
     def __parse_custom_message(self, log_entry):
         """
@@ -237,7 +578,8 @@ class LogParser(object):
         """
         match = None
         try:
-            if log_entry['value'] != '':
+            # cheap check for custom events prefix, regexp match is much more expensive
+            if log_entry['value'][:7].lower() == '[volta]':
                 match = self.volta_custom_event.match(log_entry['value'])
         except Exception:
             logger.debug('Unknown error in custom message parse: %s', exc_info=True)
@@ -264,8 +606,65 @@ class LogParser(object):
             else:
                 return log_entry
 
-    def close(self):
-        self.closed = True
+
+class LogTimestampParser(object):
+    """ Fixed format log timestamps parser, w/o strptime on every entry
+
+    Epoch of the date and minute prefix of timestamp is memoized, so only seconds and fraction are parsed
+    for most of entries. Phone wall clock is treated as UTC and the year is the current one, same as
+    format_ts_from_* functions do. Entries w/ `epoch` group (`logcat -v epoch`) are parsed as is.
+
+    Args:
+        phone_type (string): android, fmt: 02-12 12:12:12.121, or iphone, fmt: Aug 25 18:48:14
+
+    Returns:
+        int, microseconds
+    """
+
+    def __init__(self, phone_type):
+        if phone_type not in ('android', 'iphone'):
+            raise RuntimeError('Unknown phone type for log timestamps: {}'.format(phone_type))
+        self.phone_type = phone_type
+        self.prefix = None
+        self.prefix_uts = None
+
+    def __call__(self, log_entry):
+        epoch = log_entry.get('epoch')
+        if epoch is not None:
+            seconds, _, fraction = epoch.partition('.')
+            return int(seconds) * 10 ** 6 + self.__fraction(fraction)
+        time_ = log_entry['time']
+        if time_[2] != ':' or time_[5] != ':':
+            raise ValueError('Malformed time: {}'.format(time_))
+        if self.phone_type == 'android':
+            prefix = (log_entry['date'], time_[:5])
+            if time_[8] != '.' or len(time_) == 9:
+                raise ValueError('Malformed time: {}'.format(time_))
+            fraction = time_[9:]
+        else:
+            prefix = (log_entry['month'], log_entry['date'], time_[:5])
+            fraction = ''
+        if prefix != self.prefix:
+            self.prefix_uts = self.__prefix_uts(prefix)
+            self.prefix = prefix
+        seconds = int(time_[6:8])
+        if not 0 <= seconds < 60:
+            raise ValueError('Malformed time: {}'.format(time_))
+        return self.prefix_uts + seconds * 10 ** 6 + self.__fraction(fraction)
+
+    def __prefix_uts(self, prefix):
+        fmt = '%m-%d %H:%M' if self.phone_type == 'android' else '%b %d %H:%M'
+        ts = datetime.datetime.strptime(' '.join(prefix), fmt).replace(year=datetime.datetime.now().year)
+        return calendar.timegm(ts.timetuple()) * 10 ** 6
+
+    @staticmethod
+    def __fraction(fraction):
+        """ Fractional part of seconds, up to 6 digits, to microseconds """
+        if not fraction:
+            return 0
+        if len(fraction) > 6 or not fraction.isdigit():
+            raise ValueError('Malformed fraction of seconds: {}'.format(fraction))
+        return int(fraction) * 10 ** (6 - len(fraction))
 
 
 def format_ts_from_android(log_entry):
@@ -293,9 +692,8 @@ def format_ts_from_iphone(log_entry):
     )
 
 
-def string_to_np(data, type=np.uint16, sep=""):
-    chunk = np.fromstring(data, dtype=type, sep=sep)
-    return chunk
+def string_to_np(data, type=np.uint16):
+    return np.frombuffer(data, dtype=type)
 
 
 class LogReader(object):
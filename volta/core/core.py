@@ -9,6 +9,9 @@ from netort.validated_config import ValidatedConfig as VoltaConfig
 from netort import data_manager
 
 from volta.core.config.dynamic_options import DYNAMIC_OPTIONS
+from volta.common.runtime import make_runtime
+from volta.common.util import CommandPool
+from volta.core.devices import make_devices, for_each_device
 from volta.providers import boxes
 from volta.providers import phones
 from volta.listeners.sync.sync import SyncFinder
@@ -38,6 +41,8 @@ class Factory(object):
             '500hz': boxes.VoltaBox500Hz,
             'binary': boxes.VoltaBoxBinary,
             'stm32': boxes.VoltaBoxStm32,
+            'replay': boxes.VoltaBoxReplay,
+            'emulator': boxes.VoltaBoxEmulated,
 
         }
         self.phones = {
@@ -95,9 +100,15 @@ class Core(object):
         event_listeners (list): list of events listeners
         grabber_q (queue.Queue): queue for electrical currents
         phone_q (queue.Queue): queue for phone events
+        currents_listeners (list): callables, receive electrical currents as CurrentsChunk right from grabbers
+        runtime (ThreadRuntime or AsyncRuntime): runs grabbers, log readers and periodic tasks of modules
+        devices (list): box/phone pairs from `devices` config section, empty for a single pair test
+        adb_pool (CommandPool): adb commands of all phones, so multi-device tests don't flood adb server
     """
     SECTION = 'core'
     PACKAGE_SCHEMA_PATH = 'volta.core'
+    # box grabber, phone log reader and shellexec metrics of a box/phone pair
+    PIPELINES_PER_DEVICE = 3
 
     def __init__(self, configs):
         """ Configures core, parse config
@@ -153,6 +164,15 @@ class Core(object):
             raise RuntimeError('Empty config')
 
         self.factory = Factory()
+        devices_count = len(self.config.get_option('devices', 'list', [])) if 'devices' in self.config_enabled else 1
+        self.runtime = make_runtime(
+            self.config.get_option('core', 'runtime', 'thread'),
+            self.config.get_option('core', 'runtime_workers'),
+            self.PIPELINES_PER_DEVICE * max(devices_count, 1)
+        )
+        self.adb_pool = CommandPool(
+            self.config.get_option('phone', 'adb_workers', 4), self.config.get_option('phone', 'adb_timeout', 300)
+        )
 
         self._volta = None
         self._phone = None
@@ -161,6 +181,7 @@ class Core(object):
 
         self.grabber_q = q.Queue()
         self.phone_q = q.Queue()
+        self.currents_listeners = []
 
         self.start_time = None
 
@@ -168,6 +189,12 @@ class Core(object):
 
         self.finished = None
 
+        if 'devices' in self.config_enabled and 'sync' in self.config_enabled:
+            # metric offsets are set for the whole data session, there is no way to upload per device offsets
+            logger.error('`sync` is not supported w/ `devices`, sync section is disabled')
+            self.config_enabled.remove('sync')
+        self.devices = make_devices(self.config, self) if 'devices' in self.config_enabled else []
+
     @property
     def volta(self):
         if not self._volta:
@@ -195,6 +222,10 @@ class Core(object):
     def configure(self):
         """ Configures modules and prepare modules for test """
         logger.debug('Configure stage...')
+        if self.devices:
+            for_each_device(self.devices, 'configure')
+            return
+
         if 'phone' in self.config_enabled:
             self.enabled_modules.append(self.phone)
             self.phone.prepare()
@@ -211,6 +242,10 @@ class Core(object):
         logger.info('Starting test...')
         self.data_session.start_time = int(time.time() * 10 ** 6)
 
+        if self.devices:
+            for_each_device(self.devices, 'start_test', self.grabber_q, self.phone_q)
+            return
+
         if 'volta' in self.config_enabled:
             self.volta.start_test(self.grabber_q)
 
@@ -224,11 +259,21 @@ class Core(object):
         Interrupts test: stops grabbers and events parsers
         """
         logger.info('Stopping test...')
+        if self.devices:
+            for_each_device(self.devices, 'end_test')
+            return
+
         if 'volta' in self.config_enabled:
             self.volta.end_test()
         if 'phone' in self.config_enabled:
             self.phone.end()
 
+    def is_finished(self):
+        """ Test finished by itself: volta box data source is exhausted, e.g. replay reached the end of file """
+        if self.devices:
+            return all(device.is_finished() for device in self.devices)
+        return 'volta' in self.config_enabled and self.volta.is_finished()
+
     def post_process(self):
         """
         Post-process actions: sync cross correlation, upload meta information
@@ -280,7 +325,10 @@ class Core(object):
         # setting metric offsets in luna
         self.data_session.update_metric(self.sync_points)
         [module_.close() for module_ in self.enabled_modules]
+        [device.close() for device in self.devices]
+        self.adb_pool.close()
         self.data_session.close()
+        self.runtime.close()
 
         logger.info('Threads still running: %s', threading.enumerate())
         try:
@@ -299,13 +347,17 @@ class Core(object):
 
     def get_current_test_info(self, per_module=False, session_id=None):
         response = {'jobno': self.data_session.job_id, 'session_id': session_id}
-        if per_module:
+        if per_module and self.devices:
+            response['devices'] = {device.name: device.get_info() for device in self.devices}
+        elif per_module:
             for module in self.config_enabled:
                 try:
                     if module == 'volta':
                         response[module] = self.volta.get_info()
                     elif module == 'phone':
                         response[module] = self.phone.get_info()
+                    elif module == 'sync':
+                        response[module] = self.sync.get_info()
                 except AttributeError:
                     logger.info('Unable to get per_module %s current test info', per_module, exc_info=True)
                     pass
@@ -0,0 +1,190 @@
+""" Multiple box/phone pairs driven by one Core
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import pkg_resources
+import yaml
+from cerberus import Validator
+
+from volta.listeners.console.plugin import ConsoleListener
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = yaml.safe_load(pkg_resources.resource_string('volta.core', 'config/schema.yaml'))
+
+
+class DeviceConfig(object):
+    """ Config of one device pair: device sections override options of common config sections
+
+    Overrides are validated against the schema of their section, unknown options and wrong types are config errors.
+
+    Args:
+        config (VoltaConfig): common config, its volta/phone sections are defaults for every device
+        overrides (dict): device config entry, fmt: {'name': ..., 'volta': {...}, 'phone': {...}}
+    """
+    SECTIONS = ('volta', 'phone')
+
+    def __init__(self, config, overrides):
+        self.config = config
+        self.overrides = overrides
+        for section in self.SECTIONS:
+            validator = Validator(SCHEMA[section]['schema'])
+            if not validator.validate(overrides.get(section) or {}, update=True):
+                raise RuntimeError(
+                    'Device {} `{}` section is invalid: {}'.format(overrides.get('name'), section, validator.errors)
+                )
+
+    def get_option(self, section, option, default=None):
+        if section in self.SECTIONS and option in (self.overrides.get(section) or {}):
+            return self.overrides[section][option]
+        return self.config.get_option(section, option, default)
+
+
+class DeviceDataManager(object):
+    """ Data manager proxy, subscriptions get only metrics of the device """
+
+    def __init__(self, manager, device):
+        self.manager = manager
+        self.device = device
+
+    def subscribe(self, callback, filter_):
+        return self.manager.subscribe(callback, dict(filter_, device=self.device))
+
+    def __getattr__(self, name):
+        return getattr(self.manager, name)
+
+
+class DeviceDataSession(object):
+    """ Shared data session proxy, metrics of the device are created w/ `device` meta """
+
+    def __init__(self, data_session, device):
+        self.data_session = data_session
+        self.device = device
+        self.manager = DeviceDataManager(data_session.manager, device)
+
+    def new_true_metric(self, name, **kw):
+        return self.data_session.new_true_metric(name, device=self.device, **kw)
+
+    def new_event_metric(self, name, **kw):
+        return self.data_session.new_event_metric(name, device=self.device, **kw)
+
+    def __getattr__(self, name):
+        return getattr(self.data_session, name)
+
+
+class Device(object):
+    """ Box/phone pair w/ its own config, metrics and currents listeners
+
+    Modules of a device get the device as their core, data session, factory, runtime and adb pool are shared
+    w/ the core, so the cost of a device is its modules only.
+
+    Attributes:
+        name (string): device name, `device` meta of its metrics
+    """
+
+    def __init__(self, name, config, core):
+        self.name = name
+        self.config = config
+        self.factory = core.factory
+        self.runtime = core.runtime
+        self.adb_pool = core.adb_pool
+        self.data_session = DeviceDataSession(core.data_session, name)
+        self.enabled_sections = core.config_enabled
+        self.enabled_modules = []
+        self.currents_listeners = []
+        self.grabber_q = None
+        self.phone_q = None
+        self._volta = None
+        self._phone = None
+        self._console = None
+
+    @property
+    def volta(self):
+        if not self._volta:
+            self._volta = self.factory.detect_volta(self.config, self)
+        return self._volta
+
+    @property
+    def phone(self):
+        if not self._phone:
+            self._phone = self.factory.detect_phone(self.config, self)
+        return self._phone
+
+    @property
+    def console(self):
+        if not self._console:
+            self._console = ConsoleListener(self.config, self)
+        return self._console
+
+    def configure(self):
+        if 'phone' in self.enabled_sections:
+            self.enabled_modules.append(self.phone)
+            self.phone.prepare()
+        if 'console' in self.enabled_sections:
+            self.enabled_modules.append(self.console)
+
+    def start_test(self, grabber_q, phone_q):
+        self.grabber_q, self.phone_q = grabber_q, phone_q
+        if 'volta' in self.enabled_sections:
+            self.volta.start_test(grabber_q)
+        if 'phone' in self.enabled_sections:
+            self.phone.start(phone_q)
+            logger.info('Starting test apps on %s...', self.name)
+            self.phone.run_test()
+
+    def end_test(self):
+        if 'volta' in self.enabled_sections:
+            self.volta.end_test()
+        if 'phone' in self.enabled_sections:
+            self.phone.end()
+
+    def is_finished(self):
+        return 'volta' in self.enabled_sections and self.volta.is_finished()
+
+    def close(self):
+        [module_.close() for module_ in self.enabled_modules]
+
+    def get_info(self):
+        response = {}
+        for module in self.enabled_sections:
+            try:
+                if module == 'volta':
+                    response[module] = self.volta.get_info()
+                elif module == 'phone':
+                    response[module] = self.phone.get_info()
+            except AttributeError:
+                logger.info('Unable to get %s %s current test info', self.name, module, exc_info=True)
+        return response
+
+
+def make_devices(config, core):
+    """ Devices from `devices.list` config option, unnamed devices are named by their index """
+    devices = []
+    for index, overrides in enumerate(config.get_option('devices', 'list', [])):
+        name = str(overrides.get('name') or index)
+        if name in [device.name for device in devices]:
+            raise RuntimeError('Duplicate device name: {}'.format(name))
+        devices.append(Device(name, DeviceConfig(config, overrides), core))
+    if not devices:
+        raise RuntimeError('Empty devices list')
+    return devices
+
+
+def for_each_device(devices, stage, *args):
+    """ Run stage method of all devices concurrently, wait for all of them and raise the first error
+
+    Returns:
+        list: stage results in devices order
+    """
+    if len(devices) == 1:
+        return [getattr(devices[0], stage)(*args)]
+    with ThreadPoolExecutor(max_workers=len(devices), thread_name_prefix='volta-device') as pool:
+        futures = [pool.submit(getattr(device, stage), *args) for device in devices]
+    errors = [future.exception() for future in futures if future.exception()]
+    for device, future in zip(devices, futures):
+        if future.exception():
+            logger.error('Device %s %s failed', device.name, stage, exc_info=future.exception())
+    if errors:
+        raise errors[0]
+    return [future.result() for future in futures]
@@ -17,6 +17,8 @@ class ConsoleListener(DataListener):
         """
         super(ConsoleListener, self).__init__(config, core)
         self.closed = None
+        # devices of multi device core have names, stats of each one are prefixed w/ it
+        self.prefix = '\ndevice: {}'.format(core.name) if getattr(core, 'name', None) else ''
         self.output_fmt = {
             'currents': ['ts', 'value'],
             'sync': ['sys_uts', 'log_uts', 'app', 'tag', 'message'],
@@ -25,22 +27,23 @@ class ConsoleListener(DataListener):
             'fragment': ['sys_uts', 'log_uts', 'app', 'tag', 'message'],
             'unknown': ['sys_uts', 'message']
         }
-        self.core.data_session.manager.subscribe(self.put, {'type': 'metrics', 'name': 'current'})
+        self.core.currents_listeners.append(self.put)
 
     def get_info(self):
         """ mock """
         pass
 
-    def put(self, df):
+    def put(self, chunk):
         """ Process data
 
         Args:
-            df (pandas.DataFrame): dfs w/ data contents,
-                differs for each data type.
-                Should be processed differently from each other
+            chunk (CurrentsChunk): electrical currents
         """
-        if not self.closed:
-            logger.info("\n%s\n", df.describe())
+        if not self.closed and len(chunk):
+            logger.info(
+                "%s\ncount: %s\nmean: %.3f\nstd: %.3f\nmin: %.3f\nmax: %.3f\n",
+                self.prefix, len(chunk), chunk.value.mean(), chunk.value.std(), chunk.value.min(), chunk.value.max()
+            )
 
     def close(self):
         self.closed = True
@@ -0,0 +1,190 @@
+""" Offline sync search over the whole recording, from local_storage artifacts
+"""
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from volta.common.util import LogParser
+from volta.listeners.sync.sync import prepare_sync_events, find_sync
+
+logger = logging.getLogger(__name__)
+
+# sync events separated by a longer pause belong to different bursts, us
+BURST_GAP = 10 ** 6
+
+
+def burst_starts(sync_df):
+    """ Phone system uts of the first event of each sync events burst """
+    sys_uts = prepare_sync_events(sync_df, None, 1).sys_uts.values
+    return sys_uts[np.concatenate([[True], np.diff(sys_uts) >= BURST_GAP])]
+
+
+# currents and sync events bursts of a process pool worker, set once by pool initializer
+_worker = {}
+
+
+def _init_worker(currents_ts, currents_value, bursts, sample_rate, min_confidence):
+    _worker.update(
+        currents_ts=currents_ts, currents_value=currents_value, bursts=bursts,
+        sample_rate=sample_rate, min_confidence=min_confidence,
+    )
+
+
+def _search_window(args):
+    """ Process pool worker: sync search of given bursts in one window, sync points w/ best confidence or None """
+    first, window, burst_indexes = args
+    currents_ts = _worker['currents_ts'][first:first + window]
+    currents_value = _worker['currents_value'][first:first + window]
+    best = None
+    for index in burst_indexes:
+        try:
+            sync_points = find_sync(
+                currents_ts, currents_value, _worker['bursts'][index], _worker['sample_rate'], _worker['min_confidence']
+            )
+        except ValueError:
+            continue
+        if best is None or sync_points['confidence'] > best['confidence']:
+            best = sync_points
+    if best:
+        best['sync_sample'] += first
+    return best
+
+
+def scan_sync_windows(
+        currents_ts, currents_value, sync_df, sample_rate, search_interval,
+        step=None, processes=None, min_confidence=0, max_offset=None):
+    """ Sync search over the whole recording: currents are split to overlapping windows of
+    `2 * search_interval` seconds, every window is searched for sync events bursts which may fall into it,
+    in a process pool. Candidate w/ best confidence wins, so sync is found even if the first flashes were missed.
+
+    Currents are passed to pool workers once, by pool initializer, tasks are windows bounds and bursts only.
+
+    Args:
+        currents_ts (numpy.array): currents timestamps
+        currents_value (numpy.array): currents
+        sync_df (pandas.DataFrame): sync events, fmt: ['sys_uts', 'log_uts', 'message']
+        sample_rate (int): volta box sample rate
+        search_interval (int): seconds of sync events used for each burst
+        step (int): seconds between windows starts, defaults to search_interval
+        processes (int): process pool size, defaults to cpu count
+        max_offset (int): max offset of volta and phone clocks, seconds, defaults to search_interval.
+            A burst is searched in a window only if it is inside the window +- max_offset
+
+    Returns:
+        dict: sync points w/ best confidence, plus amount of `candidates` searched
+    """
+    window = 2 * search_interval * sample_rate
+    step = (step or search_interval) * sample_rate
+    margin = (search_interval if max_offset is None else max_offset) * 10 ** 6
+    starts = list(range(0, max(len(currents_value) - window, 0) + 1, step))
+    if starts[-1] + window < len(currents_value):
+        starts.append(len(currents_value) - window)
+
+    bursts = []
+    for burst_start in burst_starts(sync_df):
+        burst = prepare_sync_events(sync_df[sync_df.sys_uts >= burst_start], search_interval, sample_rate)
+        if len(burst) > 1:
+            bursts.append(burst)
+    tasks = []
+    for first in starts:
+        window_start = currents_ts[first] - margin
+        window_end = currents_ts[min(first + window, len(currents_ts)) - 1] + margin
+        burst_indexes = [
+            index for index, burst in enumerate(bursts)
+            if burst.sys_uts.values[0] >= window_start and burst.sys_uts.values[-1] <= window_end
+        ]
+        if burst_indexes:
+            tasks.append((first, window, burst_indexes))
+    candidates = sum(len(burst_indexes) for _, _, burst_indexes in tasks)
+    logger.info('Searching %s sync bursts in %s windows, %s candidates...', len(bursts), len(starts), candidates)
+    with ProcessPoolExecutor(
+            max_workers=processes, initializer=_init_worker,
+            initargs=(currents_ts, currents_value, bursts, sample_rate, min_confidence)
+    ) as pool:
+        results = [result for result in pool.map(_search_window, tasks) if result]
+    if not results:
+        raise ValueError('Sync not found in any window')
+    best = max(results, key=lambda sync_points: sync_points['confidence'])
+    best['candidates'] = candidates
+    return best
+
+
+def read_artifact(path):
+    """ Read local_storage data file: json header line followed by tsv data """
+    with open(path, 'r') as data_file:
+        meta = json.loads(data_file.readline())
+    return pd.read_csv(path, sep='\t', skiprows=1, names=meta['names'], dtype=meta['dtypes'])
+
+
+def read_artifacts(artifacts_dir):
+    """ Volta currents and phone sync events from local_storage artifacts dir
+
+    Returns:
+        tuple: currents pandas.DataFrame, fmt: ['ts', 'value'] and sync events pandas.DataFrame,
+            fmt: ['sys_uts', 'log_uts', 'message']
+    """
+    with open(os.path.join(artifacts_dir, 'meta.json')) as meta_file:
+        metrics = json.load(meta_file)['metrics']
+    currents, events = None, None
+    for name, meta in metrics.items():
+        path = os.path.join(artifacts_dir, '{}.data'.format(name))
+        if name.startswith('metrics_') and meta['meta'].get('name') == 'current':
+            currents = read_artifact(path)
+        elif name.startswith('events_') and meta['meta'].get('source') == 'phone':
+            events = read_artifact(path)
+    if currents is None or events is None:
+        raise RuntimeError('No volta currents or phone events in artifacts: {}'.format(artifacts_dir))
+
+    # events artifact keeps raw messages only, custom events are parsed the same way as LogParser does
+    custom = events['value'].astype(str).str.extract(
+        LogParser.volta_custom_event.pattern, flags=LogParser.volta_custom_event.flags
+    )
+    nanotime = pd.to_numeric(custom.nanotime, errors='coerce')
+    sync = (custom.custom_metric_type == 'sync') & nanotime.notnull()
+    first_nanotime = nanotime.dropna()
+    log_uts = nanotime // 1000 - (first_nanotime.iloc[0] // 1000 if len(first_nanotime) else 0)
+    sync_df = pd.DataFrame({
+        'sys_uts': events.ts[sync],
+        'log_uts': log_uts[sync].astype(np.int64),
+        'message': custom.message[sync].str.strip(),
+    })
+    return currents, sync_df
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='volta offline sync search over the whole recording')
+    parser.add_argument('artifacts_dir', help='local_storage artifacts dir of the test')
+    parser.add_argument('--debug', dest='debug', action='store_true', default=False)
+    parser.add_argument('-s', '--search-interval', type=int, default=30, help='seconds')
+    parser.add_argument('--step', type=int, help='seconds between windows, defaults to search interval')
+    parser.add_argument('-r', '--sample-rate', type=int, help='defaults to the rate of currents timestamps')
+    parser.add_argument('-j', '--processes', type=int, help='process pool size, defaults to cpu count')
+    parser.add_argument('--min-confidence', type=float, default=0)
+    parser.add_argument(
+        '--max-offset', type=int, help='max offset of volta and phone clocks, seconds, defaults to search interval'
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level="DEBUG" if args.debug else "INFO",
+        format='%(asctime)s [%(levelname)s] [Volta Sync] %(filename)s:%(lineno)d %(message)s')
+
+    currents, sync_df = read_artifacts(args.artifacts_dir)
+    sample_rate = args.sample_rate or int(round(
+        (len(currents) - 1) * 10 ** 6 / float(currents.ts.iloc[-1] - currents.ts.iloc[0])
+    ))
+    logger.info('%s currents samples, sample rate %s, %s sync events', len(currents), sample_rate, len(sync_df))
+    sync_points = scan_sync_windows(
+        currents.ts.values, currents.value.values.astype(np.float32), sync_df, sample_rate, args.search_interval,
+        step=args.step, processes=args.processes, min_confidence=args.min_confidence, max_offset=args.max_offset
+    )
+    print(json.dumps(sync_points, indent=4, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
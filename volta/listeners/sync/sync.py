@@ -3,8 +3,7 @@
 import numpy as np
 import pandas as pd
 import logging
-from scipy import interpolate
-from scipy import signal
+import threading
 
 from volta.common.interfaces import DataListener
 
@@ -13,19 +12,178 @@ pd.options.mode.chained_assignment = None
 logger = logging.getLogger(__name__)
 
 
+def prepare_sync_events(sync_df, search_interval, sample_rate):
+    """ Sort and dedupe sync events, drop events after search interval, map messages and calculate offsets
+
+    Sync events may come unordered and duplicated, e.g. from multiple logcat buffers. Events w/ same
+    system timestamp and message are duplicates, unknown messages are dropped.
+
+    Args:
+        sync_df (pandas.DataFrame): sync events, fmt: ['sys_uts', 'log_uts', 'message']
+        search_interval (int): seconds from the first sync event, None for all events
+        sample_rate (int): volta box sample rate
+
+    Returns:
+        pandas.DataFrame, fmt: ['sys_uts', 'log_uts', 'message', 'sample_offset'], message is 1 for rise, 0 for fall
+    """
+    message = sync_df['message'].values
+    level = np.full(len(message), -1, dtype=np.int8)
+    level[message == 'rise'] = 1
+    level[message == 'fall'] = 0
+    known = level >= 0
+    sys_uts = sync_df['sys_uts'].values[known].astype(np.int64)
+    log_uts = sync_df['log_uts'].values[known].astype(np.int64)
+    level = level[known]
+    if not len(level):
+        raise ValueError('No sync events found!')
+
+    order = np.lexsort((level, sys_uts))
+    sys_uts, log_uts, level = sys_uts[order], log_uts[order], level[order]
+    unique = np.ones(len(level), dtype=bool)
+    unique[1:] = (np.diff(sys_uts) != 0) | (np.diff(level) != 0)
+
+    # drop sync events after search interval - we don't need this
+    selected = unique
+    if search_interval is not None:
+        selected &= sys_uts < sys_uts[0] + search_interval * 10 ** 6
+    sys_uts, log_uts, level = sys_uts[selected], log_uts[selected], level[selected]
+    return pd.DataFrame({
+        'sys_uts': sys_uts,
+        'log_uts': log_uts,
+        'message': level,
+        'sample_offset': (sys_uts - sys_uts[0]) * sample_rate // 10 ** 6,
+    })
+
+
+def find_sync(currents_ts, currents_value, sync_df, sample_rate, min_confidence=0, coarse_rate=1000):
+    """ Find sync events in currents by cross-correlation, coarse-to-fine
+
+    Args:
+        currents_ts (numpy.array): currents timestamps
+        currents_value (numpy.array): currents
+        sync_df (pandas.DataFrame): sync events prepared by prepare_sync_events()
+        sample_rate (int): volta box sample rate
+        min_confidence (float): min peak-to-sidelobe ratio of cross-correlation
+        coarse_rate (int): sample rate currents are decimated to for coarse search
+
+    Returns:
+        dict: sync points, see SyncFinder
+    """
+    offsets, weights = SyncFinder.ref_edges(sync_df)
+    logger.debug('Refsignal len: %s, edges: %s', offsets[-1], len(offsets))
+
+    # coarse: correlate decimated currents over all lags
+    factor = max(sample_rate // coarse_rate, 1)
+    coarse = SyncFinder.decimate(currents_value, factor)
+    coarse_offsets = offsets // factor
+    cc = SyncFinder.correlate_edges(
+        coarse, coarse_offsets, weights, np.arange(len(coarse) - coarse_offsets[-1] + 1)
+    )
+    logger.debug('Coarse cross correlation, decimation %s: %s', factor, cc)
+    if not len(cc):
+        raise ValueError('Sync events span is longer than search interval')
+    coarse_peak = int(np.argmax(cc))
+
+    # main lobe of square signals autocorrelation is as wide as the shortest pulse
+    pulse = max(int(np.diff(offsets).min()) // factor, 1)
+    confidence = SyncFinder.peak_to_sidelobe(cc, coarse_peak, pulse)
+    logger.debug('Sync peak-to-sidelobe ratio: %s', confidence)
+    if confidence < min_confidence:
+        raise ValueError('Sync confidence {:.2f} is below {}'.format(confidence, min_confidence))
+
+    # fine: full rate correlation around coarse peak
+    lags = np.arange(
+        max(coarse_peak * factor - 2 * factor, 0),
+        min(coarse_peak * factor + 2 * factor, len(currents_value) - offsets[-1]) + 1
+    )
+    peak, fraction = SyncFinder.parabolic_peak(SyncFinder.correlate_edges(currents_value, offsets, weights, lags))
+    # [sample_offset] volta sample <-> first sync event
+    first_sync_offset_sample = int(lags[peak])
+    logger.debug(
+        '[sample_offset] volta sample <-> first sync event: %s%+.3f', first_sync_offset_sample, fraction
+    )
+
+    # [uts_offset] volta uts <-> first sync event
+    sync_offset = currents_ts[first_sync_offset_sample] + fraction * 10 ** 6 / sample_rate
+    logger.debug('[uts_offset] volta uts <-> first sync event: %s', sync_offset)
+
+    return {
+        # [uts_offset] volta uts <-> phone system uts
+        'sys_uts_offset':  int(round(
+            sync_offset - sync_df[sync_df.message > 0].iloc[0]['sys_uts']
+        )),
+        # [uts_offset] volta uts <-> phone log uts
+        'log_uts_offset': int(round(
+            sync_offset - sync_df[sync_df.message > 0].iloc[0]["log_uts"]
+        )),
+        'sync_sample': first_sync_offset_sample,
+        'sync_sample_fraction': fraction,
+        # phone system uts of sync event
+        'sync_sys_uts': int(sync_df[sync_df.message > 0].iloc[0]['sys_uts']),
+        'confidence': confidence
+    }
+
+
 class SyncFinder(DataListener):
     """ Calculates sync points for volta current measurements and phone system logs
 
+    First `search_interval` seconds of currents are collected to preallocated buffers. Search starts
+    in a background thread as soon as buffers are filled up and sync events are there, so sync points
+    are usually ready before post process. Search is repeated at post process only if more sync events
+    were received since then.
+
+    Search is coarse-to-fine: first all lags are correlated on decimated currents, then peak is refined
+    at full rate in a narrow window around coarse peak, w/ parabolic interpolation. Reference signal is
+    never built, correlation is calculated from sync event edges and currents prefix sums.
+
+    Clocks of phone and volta box drift apart, so later sync events (periodic flashes or a sync burst
+    at the end of test) are searched too: last `2 * search_interval` seconds of currents, decimated
+    to `coarse_rate`, are kept in a ring buffer. Its copy is searched in the background thread every
+    `search_interval` seconds and at post process, so grabber thread only decimates and copies chunks.
+    Sync events found there are correlated near their position predicted by the first sync, +- `max_drift`.
+    Clock skew is fitted by least squares through the first sync point, at least 2 drift sync points
+    are required, so that
+
+        volta uts = phone sys uts + sys_uts_offset + skew * (phone sys uts - sync_sys_uts)
+
     Attributes:
         search_interval (int): amount of seconds will be used for sync (searching for sync events)
         sample_rate (int): volta box sample rate - depends on software and which type of volta box you use
+        sync_points (dict): last found sync points
+        min_confidence (float): sync points w/ lower peak-to-sidelobe ratio of cross-correlation are rejected
+        coarse_rate (int): sample rate currents are decimated to for coarse search
+        max_drift (int): max clock drift between sync points, seconds
+        burst_gap (int): sync events closer than this amount of seconds belong to one burst
+        drift_min_correlation (float): drift sync points w/ lower correlation coefficient of currents
+            and reference signal are rejected. Lags window is narrow, so peak-to-sidelobe ratio is not telling there
+        drift_points (list): (phone sys uts, volta uts offset) of sync points found after the first one
     """
+    coarse_rate = 1000
+    max_drift = 1
+    burst_gap = 2
+    drift_min_correlation = 0.5
+
     def __init__(self, config, core):
         super(SyncFinder, self).__init__(config, core)
         self.search_interval = config.get_option('sync', 'search_interval')
+        self.min_confidence = config.get_option('sync', 'min_confidence', 0)
         self.sample_rate = None
-        self.sync_df = pd.DataFrame()
-        self.volta_sync_stage_df = pd.DataFrame()
+        self.sync_events = []
+        self.currents_ts = None
+        self.currents_value = None
+        self.currents_len = 0
+        self.sync_points = {}
+        self.sync_points_events = None
+        self.search = None
+        self.tail_ts = None
+        self.tail_value = None
+        self.tail_pending_ts = np.empty(0, dtype=np.int64)
+        self.tail_pending_value = np.empty(0, dtype=np.float32)
+        self.tail_written = 0
+        self.tail_checked = 0
+        self.drift_points = []
+        self.drift_last_uts = 0
+        self.lock = threading.Lock()
         self.core.data_session.manager.subscribe(
             self.put_syncs,
             {
@@ -33,101 +191,247 @@ class SyncFinder(DataListener):
                 'source': 'phone'
             }
         )
-        self.core.data_session.manager.subscribe(
-            self.put_current,
-            {
-                'type': 'metrics',
-                'name': 'current',
-                'source': 'voltabox'
-            }
-        )
+        self.core.currents_listeners.append(self.put_current)
+
+    @property
+    def search_size(self):
+        return self.search_interval * self.sample_rate
+
+    @property
+    def tail_factor(self):
+        """ Tail buffer decimation factor """
+        return max(self.sample_rate // self.coarse_rate, 1)
+
+    @property
+    def tail_size(self):
+        return 2 * self.search_size // self.tail_factor
+
+    @property
+    def sync_df(self):
+        """ Sync events received so far """
+        with self.lock:
+            if len(self.sync_events) > 1:
+                self.sync_events = [pd.concat(self.sync_events)]
+            return self.sync_events[0] if self.sync_events else pd.DataFrame()
 
     def put_syncs(self, incoming_df):
-        """ Append sync chunks to sync dataframe
+        """ Collect sync events
         """
         try:
-            gb = incoming_df.groupby('custom_metric_type')
-        except KeyError:
-            pass
-        else:
-            for name, df in gb:
-                if name == 'sync':
-                    self.sync_df = self.sync_df.append(df)
-
-    def put_current(self, dtype, incoming_df):
-        """  Append currents dataframes until search interval won't will be filled up
+            df = incoming_df[incoming_df.custom_metric_type == 'sync']
+        except AttributeError:
+            return
+        if len(df):
+            with self.lock:
+                self.sync_events.append(df)
+            self.__start_search()
+
+    def put_current(self, chunk):
+        """ Copy currents chunks to search buffers until search interval will be filled up,
+        and decimated ones to tail ring buffer
         """
-        if len(self.volta_sync_stage_df) < (self.search_interval * self.sample_rate):
-            self.volta_sync_stage_df = self.volta_sync_stage_df.append(incoming_df)
+        if self.currents_value is None:
+            self.currents_ts = np.empty(self.search_size, dtype=np.int64)
+            self.currents_value = np.empty(self.search_size, dtype=np.float32)
+            self.tail_ts = np.empty(self.tail_size, dtype=np.int64)
+            self.tail_value = np.empty(self.tail_size, dtype=np.float32)
+        length = min(len(chunk), self.search_size - self.currents_len)
+        if length:
+            self.currents_ts[self.currents_len:self.currents_len + length] = chunk.ts[:length]
+            self.currents_value[self.currents_len:self.currents_len + length] = chunk.value[:length]
+            self.currents_len += length
+            self.__start_search()
+        self.__put_tail(chunk)
+        if self.sync_points and (self.tail_written - self.tail_checked) * self.tail_factor >= self.search_size:
+            self.__start_drift_search()
+
+    def __put_tail(self, chunk):
+        """ Decimate chunk w/ samples left from previous chunk, ts of a block is ts of its first sample """
+        ts, value = chunk.ts, chunk.value
+        factor = self.tail_factor
+        if factor > 1:
+            if len(self.tail_pending_value):
+                ts = np.concatenate([self.tail_pending_ts, ts])
+                value = np.concatenate([self.tail_pending_value, value])
+            decimated = len(value) // factor * factor
+            self.tail_pending_ts, self.tail_pending_value = ts[decimated:].copy(), value[decimated:].copy()
+            ts, value = ts[:decimated:factor], self.decimate(value[:decimated], factor)
+        count = len(value)
+        ts, value = ts[-self.tail_size:], value[-self.tail_size:]
+        position = (self.tail_written + count - len(value)) % self.tail_size
+        first = min(len(value), self.tail_size - position)
+        self.tail_ts[position:position + first] = ts[:first]
+        self.tail_value[position:position + first] = value[:first]
+        self.tail_ts[:len(value) - first] = ts[first:]
+        self.tail_value[:len(value) - first] = value[first:]
+        self.tail_written += count
+
+    def __tail(self):
+        """ Copy of tail ring buffer contents in order """
+        if self.tail_written < self.tail_size:
+            return self.tail_ts[:self.tail_written].copy(), self.tail_value[:self.tail_written].copy()
+        position = self.tail_written % self.tail_size
+        return np.roll(self.tail_ts, -position), np.roll(self.tail_value, -position)
+
+    def __start_drift_search(self):
+        """ Search copy of tail buffer in background, unless search is in progress, then it's tried w/ next chunk """
+        with self.lock:
+            if self.search and self.search.is_alive():
+                return
+            self.tail_checked = self.tail_written
+            self.search = threading.Thread(target=self.__search_drift, args=self.__tail(), name='volta-sync')
+            self.search.daemon = True
+            self.search.start()
+
+    def __start_search(self):
+        """ Start background search once all data is there, unless search is in progress """
+        if self.currents_len < self.search_size or not self.sync_events:
+            return
+        with self.lock:
+            if self.search and self.search.is_alive():
+                return
+            self.search = threading.Thread(target=self.__search, name='volta-sync')
+            self.search.daemon = True
+            self.search.start()
+
+    def __search(self):
+        try:
+            sync_df = self.sync_df
+            if self.sync_points_events == self.__count_head_events(sync_df):
+                return
+            self.sync_points = self.__find_sync_points(sync_df)
+            self.sync_points_events = self.__count_head_events(sync_df)
+            logger.info('Sync points found: %s', self.sync_points)
+        except ValueError:
+            logger.debug('Failed to calculate sync pts', exc_info=True)
 
     def find_sync_points(self):
-        """ Cross correlation and calculate offsets
+        """ Wait for background search and repeat it if new sync events were received
 
         Returns:
             dict: offsets for 'volta timestamp -> system log timestamp' and 'volta timestamp -> custom log timestamp'
         """
+        logger.info('Starting sync...')
+        if self.search:
+            self.search.join()
+        sync_df = self.sync_df
+        if self.sync_points_events is None or self.sync_points_events != self.__count_head_events(sync_df):
+            try:
+                self.sync_points = self.__find_sync_points(sync_df)
+                self.sync_points_events = self.__count_head_events(sync_df)
+            except ValueError:
+                logger.debug('Failed to calculate sync pts', exc_info=True)
+                logger.warning('Failed to calculate sync pts')
+                return {}
+        self.__search_drift(*self.__tail(), final=True)
+        self.sync_points.update(self.__fit_skew())
+        return self.sync_points
+
+    def __count_head_events(self, sync_df):
+        """ Amount of sync events used for the first sync """
         try:
-            logger.info('Starting sync...')
-
-            if len(self.sync_df) == 0:
-                raise ValueError('No sync events found!')
-
-            logger.debug('Sync df contents:\n %s', self.sync_df.describe())
-            self.__prepare_sync_df()
-            logger.debug('Sync df after preparation:\n %s', self.sync_df.describe())
-            logger.debug('Sync stage volta currents dataframe:\n %s', self.volta_sync_stage_df.describe())
-
-            if len(self.volta_sync_stage_df) < (self.search_interval * self.sample_rate):
-                raise ValueError('Not enough electrical currents for sync')
-
-            refsig = self.ref_signal(self.sync_df)
-            logger.debug('Refsignal len: %s, Refsignal contents:\n %s', len(refsig), refsig)
-
-            cc = self.cross_correlate(
-                self.volta_sync_stage_df['value'],
-                refsig,
-                (self.search_interval * self.sample_rate)
-            )
-            logger.debug('Cross correlation: %s', cc)
-
-            # [sample_offset] volta sample <-> first sync event
-            first_sync_offset_sample = np.argmax(cc)
-            logger.debug('[sample_offset] volta sample <-> first sync event: %s', first_sync_offset_sample)
-
-            # [uts_offset] volta uts <-> first sync event
-            sync_offset = self.volta_sync_stage_df.iloc[first_sync_offset_sample]['ts']
-            logger.debug('[uts_offset] volta uts <-> first sync event: %s', sync_offset)
-
-            return {
-                # [uts_offset] volta uts <-> phone system uts
-                'sys_uts_offset':  int(
-                    sync_offset - self.sync_df[self.sync_df.message > 0].iloc[0]['sys_uts']
-                ),
-                # [uts_offset] volta uts <-> phone log uts
-                'log_uts_offset': int(
-                    sync_offset - self.sync_df[self.sync_df.message > 0].iloc[0]["log_uts"]
-                ),
-                'sync_sample': first_sync_offset_sample
-            }
+            return len(prepare_sync_events(sync_df, self.search_interval, self.sample_rate))
+        except (ValueError, KeyError):
+            return 0
+
+    def __search_drift(self, ts, value, final=False):
+        try:
+            bursts = self.__drift_bursts(ts, final)
         except ValueError:
-            logger.debug('Failed to calculate sync pts', exc_info=True)
-            logger.warning('Failed to calculate sync pts')
+            logger.debug('No drift sync events', exc_info=True)
+            return
+        for burst in bursts:
+            try:
+                self.__find_drift_point(burst, ts, value)
+            except ValueError:
+                logger.debug('No drift sync point found', exc_info=True)
+
+    def __drift_bursts(self, ts, final):
+        """ Bursts of sync events after the first sync, which are inside tail currents
+
+        Sync events closer than `burst_gap` seconds to each other belong to one burst. Until the end of test
+        a burst is complete when tail currents last for `burst_gap` more seconds after its last event,
+        so a burst is never searched by halves
+
+        Returns:
+            list of pandas.DataFrame, fmt: see prepare_sync_events()
+        """
+        if not len(ts):
+            raise ValueError('No currents in tail buffer')
+        offset = self.sync_points['sys_uts_offset']
+        margin = self.max_drift * 10 ** 6
+        gap = self.burst_gap * 10 ** 6
+        events = prepare_sync_events(self.sync_df, None, self.sample_rate)
+        events = events[
+            (events.sys_uts >= self.sync_points['sync_sys_uts'] + self.search_interval * 10 ** 6) &
+            (events.sys_uts > self.drift_last_uts)
+        ]
+        bursts = []
+        for _, burst in events.groupby(np.cumsum(np.diff(events.sys_uts.values, prepend=0) > gap)):
+            first, last = burst.sys_uts.values[0] + offset, burst.sys_uts.values[-1] + offset
+            if last > ts[-1] - margin - (0 if final else gap):
+                break
+            if first >= ts[0] + margin and len(burst) > 1:
+                bursts.append(burst.reset_index(drop=True))
+        return bursts
+
+    def __find_drift_point(self, burst, ts, value):
+        """ Search for burst of sync events in decimated tail currents near its position predicted by the first sync """
+        offset = self.sync_points['sys_uts_offset']
+        factor = self.tail_factor
+        rate = self.sample_rate / float(factor)
+        burst['sample_offset'] = (burst.sys_uts - burst.sys_uts[0]) * self.sample_rate // (factor * 10 ** 6)
+        offsets, weights = self.ref_edges(burst)
+
+        expected = int(np.searchsorted(ts, burst.sys_uts[0] + offset))
+        max_drift = int(self.max_drift * rate)
+        lags = np.arange(
+            max(expected - max_drift, 0),
+            min(expected + max_drift, len(value) - offsets[-1]) + 1
+        )
+        cc = self.correlate_edges(value, offsets, weights, lags)
+        peak, fraction = self.parabolic_peak(cc)
+        segment = value[lags[peak]:lags[peak] + offsets[-1]].astype(np.float64)
+        levels = burst.message.values[:-1] - np.dot(burst.message.values[:-1], np.diff(offsets)) / offsets[-1]
+        energy = np.dot(levels ** 2, np.diff(offsets)) * np.sum((segment - segment.mean()) ** 2)
+        correlation = cc[peak] / np.sqrt(energy) if energy else 0
+        if correlation < self.drift_min_correlation:
+            raise ValueError('Drift sync correlation {:.2f} is too low'.format(correlation))
+
+        sync_offset = ts[lags[peak]] + fraction * 10 ** 6 / rate - burst.sys_uts[0]
+        self.drift_points.append((int(burst.sys_uts[0]), float(sync_offset)))
+        self.drift_last_uts = burst.sys_uts.values[-1]
+        logger.info(
+            'Drift sync point found: phone sys uts %s, offset %.0f, correlation %.2f',
+            burst.sys_uts[0], sync_offset, correlation
+        )
+
+    def __fit_skew(self):
+        """ Least squares clock skew through the first sync point, one drift sync point is not enough """
+        if len(self.drift_points) < 2:
             return {}
+        sys_uts, offsets = np.array(self.drift_points).T
+        elapsed = sys_uts - self.sync_points['sync_sys_uts']
+        drift = offsets - self.sync_points['sys_uts_offset']
+        return {
+            'skew': float(np.dot(elapsed, drift) / np.dot(elapsed, elapsed)),
+            'skew_points': len(self.drift_points),
+        }
 
-    def __prepare_sync_df(self):
-        """ Reset idx, drop excessive sync data, map sync events and make offset """
-        # map messages
-        self.sync_df.loc[:, ('message')] = self.sync_df.message.map({'rise': 1, 'fall': 0})
-        self.sync_df.reset_index(inplace=True)
+    def __find_sync_points(self, sync_df):
+        """ Cross correlation and calculate offsets """
+        if len(sync_df) == 0:
+            raise ValueError('No sync events found!')
 
-        # drop sync events after search interval - we don't need this
-        self.sync_df = self.sync_df[self.sync_df.sys_uts < self.sync_df.sys_uts[0] + (self.search_interval * 10 ** 6)]
+        logger.debug('Sync df contents:\n %s', sync_df.describe())
+        sync_df = prepare_sync_events(sync_df, self.search_interval, self.sample_rate)
+        logger.debug('Sync df after preparation:\n %s', sync_df.describe())
+        logger.debug('Sync stage volta currents: %s samples', self.currents_len)
 
-        # offset
-        self.sync_df.loc[:, ('sample_offset')] = self.sync_df['sys_uts'].map(
-            lambda x: (
-                (x - self.sync_df['sys_uts'][0])
-            ) * self.sample_rate // 10**6
+        if self.currents_len < self.search_size:
+            raise ValueError('Not enough electrical currents for sync')
+        return find_sync(
+            self.currents_ts, self.currents_value, sync_df, self.sample_rate, self.min_confidence, self.coarse_rate
         )
 
     @staticmethod
@@ -136,19 +440,76 @@ class SyncFinder(DataListener):
         logger.info("Generating ref signal...")
         if len(sync) == 0:
             raise ValueError('Sync events not found.')
-        f = interpolate.interp1d(sync["sample_offset"], sync["message"], kind="zero")
-        X = np.linspace(0, sync["sample_offset"].values[-1], sync["sample_offset"].values[-1])
-        rs = f(X)
-        return rs - np.mean(rs)
+        offsets = sync["sample_offset"].values
+        rs = np.repeat(sync["message"].values[:-1].astype(np.int8), np.diff(offsets))
+        return rs - np.float32(rs.mean())
 
     @staticmethod
-    def cross_correlate(sig, ref, first=30000):
-        """ Calculate cross-correlation with lag. Take only first n lags """
-        logger.info("Calculating cross-correlation...")
-        return signal.fftconvolve(sig[:first], ref[::-1], mode="valid")
+    def ref_edges(sync):
+        """ Zero mean square reference signal as a sum of steps
+
+        Reference signal is `message` level between consequent sync events, so its correlation w/ currents
+        at some lag is a weighted sum of currents prefix sums at edges: O(edges) per lag instead of O(samples)
+
+        Returns:
+            tuple: edge offsets in samples, starting w/ 0 and ending w/ reference signal length, and edge weights
+        """
+        if len(sync) < 2:
+            raise ValueError('Not enough sync events.')
+        offsets = sync["sample_offset"].values.astype(np.int64)
+        durations = np.diff(offsets)
+        levels = sync["message"].values[:-1].astype(np.float64)
+        levels -= np.dot(levels, durations) / offsets[-1]
+        weights = np.zeros(len(offsets))
+        weights[:-1] -= levels
+        weights[1:] += levels
+        return offsets, weights
+
+    @staticmethod
+    def correlate_edges(sig, offsets, weights, lags):
+        """ Cross-correlation of `sig` w/ reference signal given by ref_edges(), for given lags """
+        prefix = np.zeros(len(sig) + 1)
+        np.cumsum(sig, out=prefix[1:])
+        cc = np.zeros(len(lags))
+        for offset, weight in zip(offsets, weights):
+            cc += weight * prefix[lags + offset]
+        return cc
+
+    @staticmethod
+    def decimate(sig, factor):
+        """ Block means of `factor` samples, incomplete last block is dropped """
+        if factor == 1:
+            return sig
+        return sig[:len(sig) // factor * factor].reshape(-1, factor).mean(axis=1)
+
+    @staticmethod
+    def parabolic_peak(cc):
+        """ Index of max value and its fractional correction, -0.5..0.5, by parabolic interpolation """
+        peak = int(np.argmax(cc))
+        fraction = 0.0
+        if 0 < peak < len(cc) - 1:
+            left, center, right = cc[peak - 1:peak + 2]
+            curvature = left - 2 * center + right
+            if curvature < 0:
+                fraction = float(0.5 * (left - right) / curvature)
+        return peak, fraction
+
+    @staticmethod
+    def peak_to_sidelobe(cc, peak, exclusion):
+        """ Peak height over sidelobes, in sidelobe standard deviations. Lags closer to peak than `exclusion`
+        belong to main lobe. Peak w/o sidelobes to compare with (too few lags, flat correlation) is not telling,
+        its confidence is 0 """
+        sidelobes = np.concatenate([cc[:max(peak - exclusion, 0)], cc[peak + exclusion + 1:]])
+        if len(sidelobes) < 2 or not sidelobes.std():
+            return 0.0
+        return float((cc[peak] - sidelobes.mean()) / sidelobes.std())
 
     def close(self):
         return
 
     def get_info(self):
-        return
+        return {
+            'currents_collected': self.currents_len,
+            'sync_events': len(self.sync_df),
+            'sync_points': self.sync_points,
+        }
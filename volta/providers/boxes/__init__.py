@@ -1,2 +1,4 @@
 from .box500hz import VoltaBox500Hz
-from .box_binary import VoltaBoxBinary, VoltaBoxStm32
\ No newline at end of file
+from .box_binary import VoltaBoxBinary, VoltaBoxStm32
+from .replay import VoltaBoxReplay
+from .emulator import VoltaBoxEmulated
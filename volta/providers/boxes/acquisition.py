@@ -0,0 +1,125 @@
+""" Serial data acquisition in a dedicated process
+"""
+import logging
+import multiprocessing
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SharedRing(object):
+    """ Single producer, single consumer byte ring in shared memory
+
+    Header holds monotonic counters of written and consumed bytes, so producer and consumer
+    never write the same counter. Capacity is rounded up to even, so ring wrap never splits a sample.
+
+    Attributes:
+        stalls (int): amount of times producer found ring full
+    """
+    WRITTEN, CONSUMED, STALLS = range(3)
+    header_size = 3 * 8
+
+    def __init__(self, capacity):
+        self.capacity = capacity + capacity % 2
+        self.shm = shared_memory.SharedMemory(create=True, size=self.header_size + self.capacity)
+        self.counters = np.ndarray(3, dtype=np.uint64, buffer=self.shm.buf)
+        self.counters[:] = 0
+        self.data = self.shm.buf[self.header_size:self.header_size + self.capacity]
+
+    def __len__(self):
+        """ Amount of bytes written, but not consumed yet """
+        return int(self.counters[self.WRITTEN]) - int(self.counters[self.CONSUMED])
+
+    @property
+    def stalls(self):
+        return int(self.counters[self.STALLS])
+
+    def write_from(self, source, max_size):
+        """ Producer: read up to max_size bytes from source right into the ring
+
+        Returns:
+            int: amount of bytes read, None if ring is full
+        """
+        written = int(self.counters[self.WRITTEN])
+        free = self.capacity - (written - int(self.counters[self.CONSUMED]))
+        if not free:
+            self.counters[self.STALLS] += 1
+            return None
+        position = written % self.capacity
+        size = min(free, self.capacity - position, max_size)
+        length = source.readinto(self.data[position:position + size]) or 0
+        self.counters[self.WRITTEN] = written + length
+        return length
+
+    def peek(self, max_size):
+        """ Consumer: contiguous view of unconsumed data, stays valid until consume() """
+        consumed = int(self.counters[self.CONSUMED])
+        position = consumed % self.capacity
+        size = min(int(self.counters[self.WRITTEN]) - consumed, self.capacity - position, max_size)
+        return self.data[position:position + size]
+
+    def consume(self, size):
+        """ Consumer: release `size` bytes to producer """
+        self.counters[self.CONSUMED] += size
+
+    def close(self):
+        """ Release shared memory. Views returned by peek() should be released before """
+        self.counters = None
+        self.data.release()
+        self.shm.close()
+        self.shm.unlink()
+
+
+class AcquisitionProcess(object):
+    """ Reads data source in a separate process and writes raw data to SharedRing
+
+    Process is forked, so it inherits already opened (and handshaked) serial device.
+    Data source should not be read in the main process while acquisition process is alive.
+
+    Attributes:
+        niceness (int): process priority increment, applied if permitted
+    """
+    niceness = -10
+
+    def __init__(self, source, ring, sample_rate, read_latency=0.05):
+        self.source = source
+        self.ring = ring
+        self.read_size = max(int(sample_rate * 2 * read_latency), 2)
+        self.read_latency = read_latency
+        try:
+            context = multiprocessing.get_context('fork')
+        except ValueError:
+            raise RuntimeError('Acquisition process is not supported on this platform')
+        self.stopped = context.Event()
+        self.process = context.Process(target=self._run, name='volta-acquisition')
+        self.process.daemon = True
+
+    def start(self):
+        self.process.start()
+        logger.info('Acquisition process started, pid: %s', self.process.pid)
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    def close(self, timeout=10):
+        self.stopped.set()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            logger.warning('Acquisition process did not stop in %s seconds, terminating...', timeout)
+            self.process.terminate()
+            self.process.join()
+
+    def _run(self):
+        try:
+            os.nice(self.niceness)
+        except (OSError, AttributeError):
+            logger.debug('Unable to raise acquisition process priority', exc_info=True)
+        while not self.stopped.is_set():
+            size = max(self.read_size, getattr(self.source, 'in_waiting', 0))
+            if self.ring.write_from(self.source, size) is None:
+                time.sleep(self.read_latency)
+
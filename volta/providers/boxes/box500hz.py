@@ -3,11 +3,11 @@
 import logging
 import queue as q
 import time
+import numpy as np
 
 from volta.common.interfaces import VoltaBox
-from volta.common.util import TimeChopper
+from volta.common.util import TimeChopper, CurrentsFanout, GrabberCounters
 
-from netort.data_processing import Drain
 
 logger = logging.getLogger(__name__)
 
@@ -25,9 +25,14 @@ class VoltaBox500Hz(VoltaBox):
         self.data_source = self.source_opener()
         logger.debug('Data source initialized: %s', self.data_source)
         self.my_metrics = {}
+        self.__create_my_metrics()
 
     def __create_my_metrics(self):
-        self.my_metrics['currents'] = self.core.data_session.new_metric()
+        self.my_metrics['current'] = self.core.data_session.new_true_metric(
+            name='current',
+            source='voltabox',
+            group='current',
+        )
 
     def start_test(self, results):
         """ Grab stage - starts grabber thread and puts data to results queue
@@ -36,8 +41,8 @@ class VoltaBox500Hz(VoltaBox):
             pipeline
                 read source data ->
                 chop by samplerate w/ ratio ->
-                make pandas DataFrame ->
-                drain DataFrame to queue `results`
+                make CurrentsChunk ->
+                drain chunks to listeners and DataFrames to data session metric
         """
         logger.info('volta start test')
         self.grabber_q = results
@@ -46,16 +51,14 @@ class VoltaBox500Hz(VoltaBox):
         for _ in range(self.sample_rate):
             self.data_source.readline()
 
-        logger.info('reader init?')
         self.reader = BoxPlainTextReader(
-            self.data_source, self.sample_rate
+            self.data_source, self.sample_rate, self.read_latency
         )
-        logger.info('reader init!')
-        self.pipeline = Drain(
+        self.pipeline = self.core.runtime.drain(
             TimeChopper(
                 self.reader, self.sample_rate, self.chop_ratio
             ),
-            self.my_metrics['currents']
+            CurrentsFanout(self.my_metrics['current'], self.core.currents_listeners)
         )
         logger.info('Starting grab thread...')
         self.pipeline.start()
@@ -70,38 +73,73 @@ class VoltaBox500Hz(VoltaBox):
     def get_info(self):
         data = {}
         if self.pipeline:
-            data['grabber_alive'] = self.pipeline.isAlive()
+            data['grabber_alive'] = self.pipeline.is_alive()
+            data['chopper_buffer_size'] = len(self.pipeline.source.buffer)
         if self.grabber_q:
             data['grabber_queue_size'] = self.grabber_q.qsize()
+        if self.reader:
+            data['grabber_counters'] = self.reader.counters.get_info()
         return data
 
 
 class BoxPlainTextReader(object):
     """
     Read chunks from source, convert and return numpy.array
+
+    Box sends one reading per line, incomplete last line of a chunk is carried over to the next one.
+    Read size is adapted to `read_latency` (seconds) like BoxBinaryReader does it
+
+    Attributes:
+        line_size (int): estimated size of a line w/ reading, bytes
     """
+    line_size = 8
 
-    def __init__(self, source, cache_size=1024 * 1024 * 10):
+    def __init__(self, source, sample_rate, read_latency=0.05):
         self.closed = False
-        self.cache_size = cache_size
         self.source = source
-        self.buffer = ""
+        self.sample_rate = sample_rate
+        self.read_latency = read_latency
+        self.read_size = max(int(self.sample_rate * self.line_size * self.read_latency), 1)
+        self.buffer = b""
+        self.counters = GrabberCounters(self.sample_rate)
 
     def _read_chunk(self):
-        data = self.source.read(self.cache_size)
-        logger.info('Data:%s', data)
+        in_waiting = getattr(self.source, 'in_waiting', 0)
+        data = self.source.read(max(self.read_size, in_waiting))
         if data:
-            parts = data.rsplit('\n', 1)
-            if len(parts) > 1:
-                ready_chunk = self.buffer + parts[0] + '\n'
-                self.buffer = parts[1]
-                # FIXME string_to_np(ready_chunk, type=float, sep='\n')
-                #return string_to_np(ready_chunk, type=float, sep='\n')
-            else:
-                self.buffer += parts[0]
+            if isinstance(data, str):
+                data = data.encode('utf-8')
+            lines, _, self.buffer = (self.buffer + data).rpartition(b'\n')
+            chunk, bad_lines = self.parse_lines(lines)
+            if bad_lines:
+                logger.warning('Dropped %s malformed lines from box', bad_lines)
+            self.counters.update(
+                len(data), len(chunk), max(in_waiting - len(data), 0) // self.line_size, bad_lines
+            )
+            return chunk
         else:
-            self.buffer += self.source.readline()
-        return None
+            time.sleep(self.read_latency)
+
+    @staticmethod
+    def parse_lines(lines):
+        """ Readings from complete lines, one reading per line, malformed lines are dropped
+
+        Returns:
+            tuple: (numpy.array of readings, number of dropped lines)
+        """
+        lines = lines.split(b'\n')
+        try:
+            return np.array(lines, dtype=np.float64), 0
+        except ValueError:
+            values, bad_lines = [], 0
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    values.append(float(line))
+                except ValueError:
+                    bad_lines += 1
+            return np.array(values, dtype=np.float64), bad_lines
 
     def __iter__(self):
         while not self.closed:
@@ -7,9 +7,9 @@ import numpy as np
 import json
 
 from volta.common.interfaces import VoltaBox
-from volta.common.util import TimeChopper, string_to_np
+from volta.common.util import TimeChopper, CurrentsFanout, GrabberCounters
+from volta.providers.boxes.acquisition import SharedRing, AcquisitionProcess
 
-from netort.data_processing import Drain
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +25,8 @@ class VoltaBoxBinary(VoltaBox):
         self.source_opener.read_timeout = self.grab_timeout
         self.data_source = self.source_opener()
         logger.debug('Data source initialized: %s', self.data_source)
+        self.acquisition_ring = None
+        self.acquisition_process = None
         self.my_metrics = {}
         self.__create_my_metrics()
 
@@ -42,8 +44,8 @@ class VoltaBoxBinary(VoltaBox):
             pipeline
                 read source data ->
                 chop by samplerate w/ ratio ->
-                make pandas DataFrame ->
-                drain DataFrame to queue `results`
+                make CurrentsChunk ->
+                drain chunks to listeners and DataFrames to data session metric
 
         Args:
             results: object answers to put() and get() methods
@@ -52,36 +54,52 @@ class VoltaBoxBinary(VoltaBox):
 
         # handshake
         logger.info('Awaiting handshake')
-        while self.data_source.readline() != "VOLTAHELLO\n":
+        while self.data_source.readline() != b"VOLTAHELLO\n":
             pass
 
-        volta_spec = json.loads(self.data_source.readline())
+        volta_spec = json.loads(self.data_source.readline().decode('utf-8'))
         self.sample_rate = volta_spec["sps"]
         logger.info('Sample rate handshake success: %s', self.sample_rate)
 
-        while self.data_source.readline() != "DATASTART\n":
+        while self.data_source.readline() != b"DATASTART\n":
             pass
 
-        self.reader = BoxBinaryReader(
-            self.data_source,
-            self.sample_rate,
-            self.slope,
-            self.offset,
-            self.power_voltage,
-            self.precision,
-            sample_swap=self.sample_swap
-        )
-        self.pipeline = Drain(
+        self.reader = self._create_reader(sample_swap=self.sample_swap)
+        self.pipeline = self.core.runtime.drain(
             TimeChopper(
                 self.reader, self.sample_rate, self.chop_ratio
             ),
-            self.my_metrics['current']
+            CurrentsFanout(self.my_metrics['current'], self.core.currents_listeners)
         )
         logger.info('Starting grab thread...')
         self.pipeline.start()
         logger.debug('Waiting grabber thread finish...')
 
+    def _create_reader(self, **kwargs):
+        """ Reader for grabber thread, reads data source directly or SharedRing fed by acquisition process """
+        if self.acquisition == 'process':
+            self.acquisition_ring = SharedRing(self.sample_rate * 2 * self.acquisition_buffer)
+            self.acquisition_process = AcquisitionProcess(
+                self.data_source, self.acquisition_ring, self.sample_rate, self.read_latency
+            )
+            self.acquisition_process.start()
+            reader_class, source = SharedRingReader, self.acquisition_ring
+        else:
+            reader_class, source = BoxBinaryReader, self.data_source
+        return reader_class(
+            source,
+            self.sample_rate,
+            self.slope,
+            self.offset,
+            self.power_voltage,
+            self.precision,
+            read_latency=self.read_latency,
+            **kwargs
+        )
+
     def end_test(self):
+        if self.acquisition_process:
+            self.acquisition_process.close()
         try:
             self.reader.close()
         except AttributeError:
@@ -94,13 +112,23 @@ class VoltaBoxBinary(VoltaBox):
         else:
             self.pipeline.join(10)
         self.data_source.close()
+        if self.acquisition_ring is not None:
+            self.reader = None
+            self.acquisition_ring.close()
 
     def get_info(self):
         data = {}
         if self.pipeline:
-            data['grabber_alive'] = self.pipeline.isAlive()
+            data['grabber_alive'] = self.pipeline.is_alive()
+            data['chopper_buffer_size'] = len(self.pipeline.source.buffer)
         if self.grabber_q:
             data['grabber_queue_size'] = self.grabber_q.qsize()
+        if self.reader:
+            data['grabber_counters'] = self.reader.counters.get_info()
+        if self.acquisition_process:
+            data['acquisition_alive'] = self.acquisition_process.is_alive()
+            data['acquisition_ring_size'] = len(self.acquisition_ring)
+            data['acquisition_ring_stalls'] = self.acquisition_ring.stalls
         return data
 
 
@@ -115,83 +143,147 @@ class VoltaBoxStm32(VoltaBoxBinary):
             pipeline
                 read source data ->
                 chop by samplerate w/ ratio ->
-                make pandas DataFrame ->
-                drain DataFrame to queue `results`
+                make CurrentsChunk ->
+                drain chunks to listeners and DataFrames to data session metric
 
         Args:
             results: object answers to put() and get() methods
         """
         self.grabber_q = results
 
-        self.reader = BoxBinaryReader(
-            self.data_source,
-            self.sample_rate,
-            self.slope,
-            self.offset,
-            self.power_voltage,
-            self.precision
-        )
-        self.pipeline = Drain(
+        self.reader = self._create_reader()
+        self.pipeline = self.core.runtime.drain(
             TimeChopper(
                 self.reader, self.sample_rate, self.chop_ratio
             ),
-            self.my_metrics['current']
+            CurrentsFanout(self.my_metrics['current'], self.core.currents_listeners)
         )
         logger.info('Starting grab thread...')
         self.pipeline.start()
         logger.debug('Waiting grabber thread finish...')
 
 
+def swap_samples(samples, swap=False):
+    """ Fix byte order of swapped samples in place
+
+    Sample is considered swapped if it is out of 12 bit range or if previous sample was swapped and
+    sample's second nibble is empty. Each sample depends on the previous one, so the state is carried
+    with cumulative maximum of indices of the samples that don't depend on the previous one.
+
+    Args:
+        samples (numpy.array): uint16 samples
+        swap (bool): whether the last sample of previous chunk was swapped
+
+    Returns:
+        bool: whether the last sample of this chunk was swapped
+    """
+    if not len(samples):
+        return swap
+    out_of_range = samples > 0x0FFF
+    independent = out_of_range | ((samples & 0x00F0) != 0)
+    last_independent = np.where(independent, np.arange(len(samples)), -1)
+    np.maximum.accumulate(last_independent, out=last_independent)
+    swapped = np.where(last_independent >= 0, out_of_range[last_independent], swap)
+    samples[swapped] = samples[swapped].byteswap()
+    return bool(swapped[-1])
+
+
 class BoxBinaryReader(object):
     """
     Read chunks from source, convert and return numpy.array
+
+    Data is read into preallocated buffer and converted in place, so there are no allocations per read.
+    Returned array is a view of reader's buffer and is overwritten by the next read,
+    consumers should copy it if they need it later (TimeChopper does).
+
+    Read size is adapted to `read_latency` (seconds): reader requests as much data as the box sends
+    during read_latency, using the biggest of nominal and measured throughput,
+    or everything that is already waiting in serial device's input buffer.
+
+    Attributes:
+        throughput_smoothing (float): weight of the last read in measured throughput
     """
+    throughput_smoothing = 0.2
 
-    def __init__(self, source, sample_rate, slope=1, offset=0, power_voltage=4700, precision=10, sample_swap=False):
+    def __init__(
+            self, source, sample_rate, slope=1, offset=0, power_voltage=4700, precision=10, sample_swap=False,
+            read_latency=0.05
+    ):
         self.closed = False
         self.source = source
         self.sample_rate = sample_rate
-        self.buffer = ""
-        self.orphan_byte = None
         self.slope = slope
         self.offset = offset
         self.precision = precision
         self.power_voltage = float(power_voltage)
         self.swap = False
         self.sample_swap = sample_swap
+        self.scale = self.power_voltage / (2 ** self.precision) * self.slope
+
+        self.read_latency = read_latency
+        self.nominal_throughput = self.sample_rate * 2
+        self.throughput = self.nominal_throughput
+        self.last_read_ts = None
+        self.in_waiting = 0
+        self.counters = GrabberCounters(self.sample_rate)
+        # serial devices and files read straight into reader's buffer, other sources are read and copied
+        self.source_readinto = hasattr(source, 'readinto')
+
+        # max read size
+        self.read_size = self.sample_rate * 2 * 10
+        # first byte is reserved for orphan byte of previous read
+        self.buffer = bytearray(self.read_size + 1)
+        self.buffer_view = memoryview(self.buffer)
+        self.orphan_byte = 0
+        self.samples = np.frombuffer(self.buffer, dtype='<u2', count=self.read_size // 2)
+        self.values = np.empty(self.read_size // 2, dtype=np.float32)
+
+    def _read_into(self, target):
+        """ Read data from source into target memoryview, returns amount of bytes read """
+        if self.source_readinto:
+            return self.source.readinto(target) or 0
+        data = self.source.read(len(target))
+        target[:len(data)] = data
+        return len(data)
+
+    def _convert(self, samples):
+        """ Fix byte order and calibrate uint16 samples, returns view of reader's values buffer """
+        if self.sample_swap:
+            self.swap = swap_samples(samples, self.swap)
+        chunk = self.values[:len(samples)]
+        np.multiply(samples, self.scale, out=chunk)
+        np.add(chunk, self.offset, out=chunk)
+        return chunk
+
+    def _next_read_size(self):
+        """ Amount of bytes to request from source """
+        size = int(max(self.throughput, self.nominal_throughput) * self.read_latency)
+        self.in_waiting = getattr(self.source, 'in_waiting', 0)
+        size = max(size, self.in_waiting, 2)
+        return min(size, self.read_size)
+
+    def __update_throughput(self, length):
+        now = time.time()
+        if self.last_read_ts is not None and now > self.last_read_ts:
+            self.throughput += self.throughput_smoothing * (length / (now - self.last_read_ts) - self.throughput)
+        self.last_read_ts = now
 
-    def __sample_swap(self, data):
-        lst = list(data)
-        for i in range(len(lst)/2):
-            lo = ord(lst[i*2])
-            hi = ord(lst[i*2+1])
-            word = (hi << 8) + lo
-            if word>0x0FFF or (self.swap and (word&0x00F0)==0):
-                self.swap = True
-                tmp = lst[i*2]
-                lst[i*2] = lst[i*2+1]
-                lst[i*2+1] = tmp
-            else:
-                self.swap = False
-        data = ''.join(lst)
-        return data
-    
     def _read_chunk(self):
-        data = self.source.read(self.sample_rate * 2 * 10)
-        if data:
+        length = self._read_into(self.buffer_view[self.orphan_byte:self.orphan_byte + self._next_read_size()])
+        if length:
+            self.__update_throughput(length)
+            received = length
+            length += self.orphan_byte
+            count = length // 2
+            self.counters.update(received, count, max(self.in_waiting - received, 0) // 2)
+            chunk = self._convert(self.samples[:count])
+            self.orphan_byte = length % 2
             if self.orphan_byte:
-                data = self.orphan_byte + data
-                self.orphan_byte = None
-            if len(data) % 2 != 0:
-                self.orphan_byte = data[-1:]
-                data = data[:-1]
-            if self.sample_swap:
-                data = self.__sample_swap(data)
-            chunk = string_to_np(data).astype(np.float32) * (
-                self.power_voltage / (2 ** self.precision)) * self.slope + self.offset
+                self.buffer[0] = self.buffer[length - 1]
             return chunk
         else:
-            time.sleep(1)
+            self.last_read_ts = None
+            time.sleep(self.read_latency)
 
     def __iter__(self):
         while not self.closed:
@@ -202,6 +294,29 @@ class BoxBinaryReader(object):
         self.closed = True
 
 
+class SharedRingReader(BoxBinaryReader):
+    """
+    Read raw data from SharedRing, convert and return numpy.array
+
+    Samples are converted right from shared memory, without copying to reader's buffer
+    """
+
+    def __init__(self, ring, sample_rate, *args, **kwargs):
+        super(SharedRingReader, self).__init__(ring, sample_rate, *args, **kwargs)
+        self.ring = ring
+
+    def _read_chunk(self):
+        view = self.ring.peek(self.read_size)
+        count = len(view) // 2
+        if count:
+            chunk = self._convert(np.frombuffer(view, dtype='<u2', count=count))
+            self.ring.consume(count * 2)
+            self.counters.update(count * 2, count, len(self.ring) // 2)
+            return chunk
+        else:
+            time.sleep(self.read_latency)
+
+
 # ==================================================
 
 def main():
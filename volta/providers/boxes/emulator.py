@@ -0,0 +1,154 @@
+""" Binary Volta box emulator
+"""
+import json
+import logging
+import multiprocessing
+import os
+import time
+import tty
+
+import numpy as np
+
+from volta.providers.boxes.box_binary import VoltaBoxBinary
+
+logger = logging.getLogger(__name__)
+
+
+class VoltaBoxEmulator(object):
+    """ Emulates binary Volta box on a pseudo terminal pair, writer runs in a separate process
+
+    Speaks the wire protocol of binary box firmware: `VOLTAHELLO` / json spec / `DATASTART` handshake,
+    followed by little-endian uint16 samples. Samples are 12 bit sawtooth, sample N has value N % 4096,
+    so readers can check stream continuity.
+
+    Like the real box, emulator doesn't wait for the reader: bytes that don't fit into pty buffer are lost.
+
+    Args:
+        sample_rate (int): samples per second
+        interval (float): interval between writes, seconds
+        jitter (float): max random delay added to each write interval, seconds
+        drop_rate (float): probability of each byte to be dropped
+        swap_rate (float): probability of each sample to be sent w/ swapped bytes
+        seed (int): random seed for faults and jitter
+
+    Attributes:
+        device (string): path to pty device, should be opened as serial device by readers
+        counters: shared array of sent samples, dropped bytes and bytes lost on pty overruns
+    """
+    SENT_SAMPLES, DROPPED_BYTES, OVERRUN_BYTES = range(3)
+
+    def __init__(self, sample_rate=10000, interval=0.01, jitter=0, drop_rate=0, swap_rate=0, seed=None):
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.swap_rate = swap_rate
+        self.seed = seed
+        try:
+            context = multiprocessing.get_context('fork')
+        except ValueError:
+            raise RuntimeError('VoltaBox emulator is not supported on this platform')
+        self.master, self.slave = os.openpty()
+        try:
+            tty.setraw(self.slave)
+            self.device = os.ttyname(self.slave)
+        except Exception:
+            os.close(self.master)
+            os.close(self.slave)
+            raise
+        self.counters = context.Array('q', 3)
+        self.stopped = context.Event()
+        self.process = context.Process(target=self._run, name='volta-emulator')
+        self.process.daemon = True
+
+    def start(self):
+        self.process.start()
+        logger.info('VoltaBox emulator started on %s, sample rate %s', self.device, self.sample_rate)
+
+    def close(self):
+        """ Stop writer process if it was started and close pty pair """
+        self.stopped.set()
+        if self.process.pid is not None:
+            self.process.join(10)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+        os.close(self.master)
+        os.close(self.slave)
+
+    def _run(self):
+        random = np.random.RandomState(self.seed)
+        os.write(self.master, "\nVOLTAHELLO\n{spec}\nDATASTART\n".format(
+            spec=json.dumps({'sps': self.sample_rate})
+        ).encode('utf-8'))
+        os.set_blocking(self.master, False)
+        start_time = time.time()
+        sent = 0
+        while not self.stopped.is_set():
+            time.sleep(self.interval + random.uniform(0, self.jitter))
+            count = int((time.time() - start_time) * self.sample_rate) - sent
+            samples = (np.arange(sent, sent + count, dtype=np.int64) % 4096).astype('<u2')
+            sent += count
+            if self.swap_rate:
+                swapped = random.rand(count) < self.swap_rate
+                samples[swapped] = samples[swapped].byteswap()
+            data = samples.tobytes()
+            if self.drop_rate:
+                dropped = np.flatnonzero(random.rand(len(data)) < self.drop_rate)
+                data = np.delete(np.frombuffer(data, dtype=np.uint8), dropped).tobytes()
+                self.counters[self.DROPPED_BYTES] += len(dropped)
+            try:
+                written = os.write(self.master, data)
+            except BlockingIOError:
+                written = 0
+            self.counters[self.OVERRUN_BYTES] += len(data) - written
+            self.counters[self.SENT_SAMPLES] = sent
+
+    def get_info(self):
+        return {
+            'sent_samples': self.counters[self.SENT_SAMPLES],
+            'dropped_bytes': self.counters[self.DROPPED_BYTES],
+            'overrun_bytes': self.counters[self.OVERRUN_BYTES],
+        }
+
+
+class VoltaBoxEmulated(VoltaBoxBinary):
+    """ VoltaBoxEmulated - binary box w/ VoltaBoxEmulator as data source, `source` option is ignored
+
+    Data is read through the same serial code path as for real boxes
+    """
+
+    def __init__(self, config, core):
+        emulator_config = config.get_option('volta', 'emulator', {})
+        self.emulator = VoltaBoxEmulator(
+            sample_rate=config.get_option('volta', 'sample_rate', 10000),
+            interval=emulator_config.get('interval', 0.01),
+            jitter=emulator_config.get('jitter', 0),
+            drop_rate=emulator_config.get('drop_rate', 0),
+            swap_rate=emulator_config.get('swap_rate', 0),
+            seed=emulator_config.get('seed'),
+        )
+        # base init opens emulator pty as data source, so emulator is created first and closed on failure
+        try:
+            super(VoltaBoxEmulated, self).__init__(config, core)
+        except Exception:
+            if getattr(self, 'data_source', None) is not None:
+                self.data_source.close()
+            self.emulator.close()
+            raise
+
+    def _source_path(self, config):
+        return self.emulator.device
+
+    def start_test(self, results):
+        self.emulator.start()
+        super(VoltaBoxEmulated, self).start_test(results)
+
+    def end_test(self):
+        super(VoltaBoxEmulated, self).end_test()
+        self.emulator.close()
+
+    def get_info(self):
+        data = super(VoltaBoxEmulated, self).get_info()
+        data['emulator'] = self.emulator.get_info()
+        return data
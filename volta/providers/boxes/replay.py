@@ -0,0 +1,94 @@
+""" Replay of recorded binary Volta box data
+"""
+import logging
+import time
+
+from volta.common.util import TimeChopper, CurrentsFanout
+from volta.providers.boxes.box_binary import VoltaBoxBinary, BoxBinaryReader
+
+
+logger = logging.getLogger(__name__)
+
+
+class VoltaBoxReplay(VoltaBoxBinary):
+    """ VoltaBoxReplay - streams raw capture of binary box (e.g. `output.bin` of firmware grabbers)
+    through the same pipeline as a live box, finishes at the end of capture
+
+    Attributes:
+        replay_speed (float): multiple of real time, 0 means as fast as possible
+    """
+
+    def __init__(self, config, core):
+        super(VoltaBoxReplay, self).__init__(config, core)
+        self.replay_speed = config.get_option('volta', 'replay_speed', 0)
+
+    def start_test(self, results):
+        """ Grab stage - starts grabber thread, there is no handshake in captures,
+        sample rate is taken from config
+
+            pipeline
+                read capture ->
+                chop by samplerate w/ ratio ->
+                make CurrentsChunk ->
+                drain chunks to listeners and DataFrames to data session metric
+
+        Args:
+            results: object answers to put() and get() methods
+        """
+        self.grabber_q = results
+        self.reader = BoxReplayReader(
+            self.data_source,
+            self.sample_rate,
+            self.slope,
+            self.offset,
+            self.power_voltage,
+            self.precision,
+            sample_swap=self.sample_swap,
+            read_latency=self.read_latency,
+            replay_speed=self.replay_speed
+        )
+        self.pipeline = self.core.runtime.drain(
+            TimeChopper(
+                self.reader, self.sample_rate, self.chop_ratio
+            ),
+            CurrentsFanout(self.my_metrics['current'], self.core.currents_listeners)
+        )
+        logger.info('Starting replay of %s, speed: %s', self.source, self.replay_speed or 'max')
+        self.pipeline.start()
+
+    def is_finished(self):
+        return self.pipeline is not None and not self.pipeline.is_alive()
+
+
+class BoxReplayReader(BoxBinaryReader):
+    """
+    Read recorded data from file, convert and return numpy.array. Closes itself at the end of file
+
+    Attributes:
+        eof (bool): end of file is reached, there is nothing left to read on close
+    """
+
+    def __init__(self, source, sample_rate, *args, **kwargs):
+        self.replay_speed = kwargs.pop('replay_speed', 0)
+        super(BoxReplayReader, self).__init__(source, sample_rate, *args, **kwargs)
+        self.eof = False
+
+    def _read_chunk(self):
+        chunk = super(BoxReplayReader, self)._read_chunk()
+        if chunk is None:
+            logger.info('Replay finished, %s samples read', self.counters.samples)
+            self.eof = True
+            self.closed = True
+        elif self.replay_speed:
+            # data is ahead of wall clock
+            ahead = self.counters.samples / float(self.sample_rate * self.replay_speed) - \
+                (time.time() - self.counters.start_ts)
+            if ahead > 0:
+                time.sleep(ahead)
+        return chunk
+
+    def __iter__(self):
+        while not self.closed:
+            yield self._read_chunk()
+        if not self.eof:
+            yield self._read_chunk()
@@ -5,11 +5,10 @@ import logging
 import re
 import pkg_resources
 import time
-import threading
 import subprocess
 import pandas as pd
 
-from netort.data_processing import Drain, get_nowait_from_queue
+from netort.data_processing import get_nowait_from_queue
 from netort.resource import manager as resource
 
 from volta.common.interfaces import Phone
@@ -38,6 +37,25 @@ event_regexp = r"""
     $
     """
 
+# `logcat -v epoch` format, seconds since epoch w/ fraction, android 7.0+
+epoch_event_regexp = r"""
+    ^\s*(?P<epoch>\d+\.\d+)
+    \s+
+    \S+
+    \s+
+    \S+
+    \s+
+    \S+
+    \s+
+    \S+
+    \s+
+    (?P<value>.*)
+    $
+    """
+
+# first sdk version w/ `logcat -v epoch`
+LOGCAT_EPOCH_SDK = 24
+
 
 class AndroidPhone(Phone):
     """ Android phone worker class - work w/ phone, read phone logs, run test apps and store data
@@ -52,6 +70,7 @@ class AndroidPhone(Phone):
         test_class (string, optional): app class to be started during test execution
         test_package (string, optional): app package to be started during test execution
         test_runner (string, optional): app runner to be started during test execution
+        adb_timings (list): adb commands executed by adb_execution, fmt: {'cmd', 'retcode', 'elapsed'}
 
     """
 
@@ -82,15 +101,8 @@ class AndroidPhone(Phone):
         self.test_package = config.get_option('phone', 'test_package')
         self.test_runner = config.get_option('phone', 'test_runner')
         self.cleanup_apps = config.get_option('phone', 'cleanup_apps')
-        try:
-            self.compiled_regexp = re.compile(
-                config.get_option('phone', 'event_regexp', event_regexp), re.VERBOSE | re.IGNORECASE
-            )
-        except SyntaxError:
-            logger.debug('Unable to parse specified regexp', exc_info=True)
-            raise RuntimeError(
-                "Unable to parse specified regexp: %s" % config.get_option('phone', 'event_regexp', event_regexp)
-            )
+        self.logcat_filterspecs = config.get_option('phone', 'logcat_filterspecs', [])
+        self.adb_timings = []
         self.logcat_pipeline = None
         self.test_performer = None
         self.phone_q = None
@@ -98,17 +110,25 @@ class AndroidPhone(Phone):
         subprocess.call('adb start-server', shell=True)  # start adb server
         self.__test_interaction_with_phone()
 
+        # custom regexp is written for default logcat format, so epoch format is used w/ default regexp only
+        # options w/o schema default are absent in validated config, get_option raises KeyError w/o default
+        self.logcat_epoch = not config.get_option('phone', 'event_regexp', '') and self.__logcat_epoch_supported()
+        regexp = config.get_option('phone', 'event_regexp', epoch_event_regexp if self.logcat_epoch else event_regexp)
+        try:
+            self.compiled_regexp = re.compile(regexp, re.VERBOSE | re.IGNORECASE)
+        except (SyntaxError, re.error):
+            logger.debug('Unable to parse specified regexp', exc_info=True)
+            raise RuntimeError("Unable to parse specified regexp: %s" % regexp)
+
         self.worker = None
         self.closed = False
 
         self.shellexec_metrics = config.get_option('phone', 'shellexec_metrics')
-        self.shellexec_executor = threading.Thread(target=self.__shell_executor)
-        self.shellexec_executor.setDaemon(True)
-        self.shellexec_executor.start()
-
         self.my_metrics = {}
         self.__create_my_metrics()
 
+        self.shellexec_executor = self.core.runtime.periodic(self.__collect_shellexec_metrics, 0.1)
+
     def __create_my_metrics(self):
         self.my_metrics['events'] = self.core.data_session.new_event_metric(
             name='events',
@@ -154,53 +174,71 @@ class AndroidPhone(Phone):
         worker.close()
         logger.info('Command \'%s\' executed on device %s. Retcode: %s', cmd, self.source, worker.is_finished())
 
-    def adb_execution(self, cmd):
-        def read_process_queues_and_report(outs_q, errs_q):
-            outputs = get_nowait_from_queue(outs_q)
-            for chunk in outputs:
-                logger.debug('Command \'%s\' output: %s', cmd, chunk.strip())
-            errors = get_nowait_from_queue(errs_q)
-            for err_chunk in errors:
-                logger.warning('Errors in command \'%s\' output: %s', cmd, err_chunk.strip())
-        worker = Executioner(cmd)
-        outs_q, errs_q = worker.execute()
-        while worker.is_finished() is None:
-            read_process_queues_and_report(outs_q, errs_q)
-            time.sleep(1)
-        read_process_queues_and_report(outs_q, errs_q)
-        while not outs_q.qsize() != 0 and errs_q.qsize() != 0:
-            time.sleep(0.5)
-        worker.close()
-        logger.info('Command \'%s\' executed on device %s. Retcode: %s', cmd, self.source, worker.is_finished())
-        if worker.is_finished() != 0:
-            raise RuntimeError('Failed to execute adb command \'%s\'' % cmd)
+    def __logcat_epoch_supported(self):
+        """ `logcat -v epoch` is available since android 7.0 """
+        cmd = "adb -s {device_id} shell getprop ro.build.version.sdk".format(device_id=self.source)
+        # run in adb pool, so hung adb is killed after adb_timeout
+        result = self.core.adb_pool.submit(cmd).result()
+        try:
+            if result['retcode'] != 0:
+                raise ValueError('retcode: {}'.format(result['retcode']))
+            sdk = int(result['stdout'].strip())
+        except ValueError:
+            logger.warning('Unable to get sdk version of device %s', self.source, exc_info=True)
+            return False
+        logger.info('Device %s sdk version: %s', self.source, sdk)
+        return sdk >= LOGCAT_EPOCH_SDK
+
+    def adb_execution(self, *cmds):
+        """ Execute independent adb commands concurrently in adb pool, return when all of them exit
+
+        Raises:
+            RuntimeError: some of commands failed
+        """
+        futures = [self.core.adb_pool.submit(cmd) for cmd in cmds]
+        results = [future.result() for future in futures]
+        self.adb_timings.extend(
+            {key: result[key] for key in ('cmd', 'retcode', 'elapsed')} for result in results
+        )
+        failed = [result['cmd'] for result in results if result['retcode'] != 0]
+        if failed:
+            raise RuntimeError('Failed to execute adb commands on device %s: %s' % (self.source, ', '.join(failed)))
+        return results
 
     def prepare(self):
         """ Phone preparation: install apps etc
 
         pipeline:
-            install lightning
-            install apks
+            uninstall cleanup apps
+            install lightning and apks
             clean log
+
+        Commands of a stage are independent and run concurrently
         """
+        start_time = time.time()
         # apps cleanup
-        for apk in self.cleanup_apps:
-            self.adb_execution("adb -s {device_id} uninstall {app}".format(device_id=self.source, app=apk))
+        if self.cleanup_apps:
+            self.adb_execution(*[
+                "adb -s {device_id} uninstall {app}".format(device_id=self.source, app=apk)
+                for apk in self.cleanup_apps
+            ])
 
-        # install lightning
+        # install lightning and apks
         self.lightning_apk_fname = resource.get_opener(self.lightning_apk_path).get_filename
-        logger.info('Installing lightning apk...')
-        self.adb_execution(
-            "adb -s {device_id} install -r -d -t {apk}".format(device_id=self.source, apk=self.lightning_apk_fname)
-        )
-
-        # install apks
-        for apk in self.test_apps:
-            apk_fname = resource.get_opener(apk).get_filename
-            self.adb_execution("adb -s {device_id} install -r -d -t {apk}".format(device_id=self.source, apk=apk_fname))
+        apk_fnames = [self.lightning_apk_fname] + [resource.get_opener(apk).get_filename for apk in self.test_apps]
+        logger.info('Installing lightning and %s test apks...', len(self.test_apps))
+        self.adb_execution(*[
+            "adb -s {device_id} install -r -d -t {apk}".format(device_id=self.source, apk=apk_fname)
+            for apk_fname in apk_fnames
+        ])
 
         # clean logcat
         self.adb_execution("adb -s {device_id} logcat -c".format(device_id=self.source))
+        logger.info(
+            'Device %s prepared in %.1fs, %s adb commands took %.1fs in total',
+            self.source, time.time() - start_time, len(self.adb_timings),
+            sum(timing['elapsed'] for timing in self.adb_timings)
+        )
 
     def start(self, results):
         """ Grab stage: starts log reader, make sync w/ flashlight
@@ -222,13 +260,18 @@ class AndroidPhone(Phone):
 
     def __start_async_logcat(self):
         """ Start logcat read in subprocess and make threads to read its stdout/stderr to queues """
-        cmd = "adb -s {device_id} logcat".format(device_id=self.source)
-        self.worker = Executioner(cmd)
+        cmd = "adb -s {device_id} logcat{fmt}{filterspecs}".format(
+            device_id=self.source,
+            fmt=' -v epoch' if self.logcat_epoch else '',
+            filterspecs=''.join(' {}'.format(spec) for spec in self.logcat_filterspecs)
+        )
+        self.worker = self.core.runtime.executioner(cmd, batch=True)
         out_q, err_q = self.worker.execute()
 
-        self.logcat_pipeline = Drain(
+        self.logcat_pipeline = self.core.runtime.drain(
             LogParser(
-                out_q, self.compiled_regexp, self.config.get_option('phone', 'type')
+                out_q, self.compiled_regexp, self.config.get_option('phone', 'type'),
+                prefilter=self.config.get_option('phone', 'prefilter', [])
             ),
             self.my_metrics['events']
         )
@@ -247,22 +290,27 @@ class AndroidPhone(Phone):
             logger.info('Infinite loop for volta because there are no tests specified, waiting for SIGINT')
             cmd = '/bin/bash -c \'while [ 1 ]; do sleep 1; done\''
         logger.info('Command \'%s\' executing...', cmd)
-        self.test_performer = Executioner(cmd)
+        self.test_performer = self.core.runtime.executioner(cmd)
         self.test_performer.execute()
 
     def end(self):
         """ Stop test and grabbers """
         self.closed = True
+        self.shellexec_executor.close()
         if self.worker:
             self.worker.close()
         if self.test_performer:
             self.test_performer.close()
         if self.logcat_pipeline:
+            self.logcat_pipeline.source.close()
             self.logcat_pipeline.close()
 
         # apps cleanup
-        for apk in self.cleanup_apps:
-            self.adb_execution("adb -s {device_id} uninstall {app}".format(device_id=self.source, app=apk))
+        if self.cleanup_apps:
+            self.adb_execution(*[
+                "adb -s {device_id} uninstall {app}".format(device_id=self.source, app=apk)
+                for apk in self.cleanup_apps
+            ])
 
     def close(self):
         pass
@@ -273,10 +321,12 @@ class AndroidPhone(Phone):
             data['grabber_queue_size'] = self.phone_q.qsize()
         if self.test_performer:
             data['test_performer_is_finished'] = self.test_performer.is_finished()
+        data['adb_timings'] = self.adb_timings
         return data
 
-    def __shell_executor(self):
-        while not self.closed:
+    def __collect_shellexec_metrics(self):
+        """ Shellexec metrics collection pass, each metric is collected once a second """
+        if not self.closed:
             for key, value in self.shellexec_metrics.items():
                 try:
                     if not self.shellexec_metrics[key].get('last_ts') \
@@ -303,8 +353,6 @@ class AndroidPhone(Phone):
                     logger.warning('Failed to collect shellexec metric: %s', key)
                     logger.debug('Failed to collect shellexec metric: %s', key, exc_info=True)
 
-            time.sleep(0.1)
-
     @staticmethod
     def __execute_shellexec_metric(cmd):
         proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True)
@@ -4,7 +4,7 @@ import logging
 import re
 import time
 
-from netort.data_processing import Drain, get_nowait_from_queue
+from netort.data_processing import get_nowait_from_queue
 
 from volta.common.interfaces import Phone
 from volta.common.util import Executioner, LogParser
@@ -139,6 +139,7 @@ class iPhone(Phone):
         """ pipeline: stop async log process, readers and queues """
         self.worker.close()
         if self.logcat_pipeline:
+            self.logcat_pipeline.source.close()
             self.logcat_pipeline.close()
 
     def __start_async_log(self):
@@ -147,12 +148,13 @@ class iPhone(Phone):
             path=self.path_to_util,
             device_id=self.source
         )
-        self.worker = Executioner(cmd)
+        self.worker = self.core.runtime.executioner(cmd, batch=True)
         out_q, err_q = self.worker.execute()
 
-        self.logcat_pipeline = Drain(
+        self.logcat_pipeline = self.core.runtime.drain(
             LogParser(
-                out_q, self.compiled_regexp, self.config.get_option('phone', 'type')
+                out_q, self.compiled_regexp, self.config.get_option('phone', 'type'),
+                prefilter=self.config.get_option('phone', 'prefilter', [])
             ),
             self.my_metrics['events']
         )